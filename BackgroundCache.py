@@ -0,0 +1,72 @@
+"""
+Plugin-wide cache of precomposited key backgrounds.
+A background is solid black with the brightened, alpha-scaled NVIDIA logo
+on top. Cached images are shared read-only: callers composite onto them
+with Image.alpha_composite, which always returns a new image.
+"""
+
+from collections import OrderedDict
+import os
+import threading
+
+from PIL import Image
+
+LOGO_FILE = "nvidia_logo.png"
+
+# Brightening applied to the green logo for visibility on black
+LOGO_BRIGHTNESS = 1.8
+
+# Maximum number of backgrounds kept in memory
+MAX_BACKGROUNDS = 8
+
+_backgrounds: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_background(plugin_dir: str, size: tuple[int, int], opacity: float,
+                   brightness: float = LOGO_BRIGHTNESS):
+    """
+    Get the background for the given size and logo look, building it on first use.
+    Returns None if the logo file is missing. Editing the logo file changes
+    its mtime and therefore the cache key.
+    """
+    logo_path = os.path.join(plugin_dir, LOGO_FILE)
+    try:
+        mtime = os.path.getmtime(logo_path)
+    except OSError:
+        return None
+
+    key = (logo_path, tuple(size), brightness, opacity, mtime)
+    with _lock:
+        background = _backgrounds.get(key)
+        if background is not None:
+            _backgrounds.move_to_end(key)
+            return background
+
+    background = build_background(logo_path, size, opacity, brightness)
+
+    with _lock:
+        _backgrounds[key] = background
+        _backgrounds.move_to_end(key)
+        while len(_backgrounds) > MAX_BACKGROUNDS:
+            _backgrounds.popitem(last=False)
+    return background
+
+
+def build_background(logo_path: str, size: tuple[int, int], opacity: float, brightness: float) -> Image.Image:
+    """Compose black + logo, using a single lookup table for all four channels"""
+    logo = Image.open(logo_path).convert("RGBA")
+    logo = logo.resize(tuple(size), Image.Resampling.LANCZOS)
+
+    color_lut = [min(255, int(x * brightness)) for x in range(256)]
+    alpha_lut = [int(x * opacity) for x in range(256)]
+    logo = logo.point(color_lut * 3 + alpha_lut)
+
+    background = Image.new("RGBA", tuple(size), (0, 0, 0, 255))
+    background.alpha_composite(logo)
+    return background
+
+
+def clear_backgrounds():
+    with _lock:
+        _backgrounds.clear()
@@ -0,0 +1,144 @@
+"""
+Incremental downsampling of long graph windows to the key's pixel width.
+
+A window longer than DOWNSAMPLE_COLUMNS samples is split into buckets of
+equal size, aligned to the first sample ever recorded, so a completed bucket
+never changes and its points are computed exactly once. Only the newest,
+still filling bucket is recomputed per frame.
+
+Modes:
+    "envelope": the min and max of every bucket, in the order they occurred,
+                so spikes of a single sample stay visible
+    "lttb":     Largest-Triangle-Three-Buckets, one representative point per
+                bucket that keeps the visual shape of the line
+"""
+
+import math
+
+import numpy as np
+
+from plugins.com_streamcontroller_NVIDIAPlugin.RingBuffer import RingBuffer
+
+# Widest key in pixels (Stream Deck+ keys are 120 px), more points per key
+# cannot be told apart
+DOWNSAMPLE_COLUMNS = 120
+
+DOWNSAMPLE_MODES = ("envelope", "lttb")
+
+
+def get_bucket_size(time_period: int, columns: int = DOWNSAMPLE_COLUMNS) -> int:
+    """Samples per bucket for a window, 1 if it fits `columns` without downsampling"""
+    return max(1, math.ceil(time_period / columns))
+
+
+class Downsampler:
+    """Downsampled view of the newest `time_period` samples of several series"""
+
+    def __init__(self, mode: str, series_count: int, time_period: int, columns: int = DOWNSAMPLE_COLUMNS):
+        self.mode = mode if mode in DOWNSAMPLE_MODES else DOWNSAMPLE_MODES[0]
+        self.bucket_size = get_bucket_size(time_period, columns)
+        self.buckets = math.ceil(time_period / self.bucket_size)  # Shown buckets, including the current one
+
+        # Points of completed buckets; the newest bucket(s) are computed per frame
+        if self.mode == "envelope":
+            capacity = 2 * (self.buckets - 1)
+        else:
+            capacity = max(1, self.buckets - 2)
+        self.points = [RingBuffer(capacity) for _ in range(series_count)]
+
+        # Bucket being filled. It is only completed once the next sample
+        # arrives, so it always holds at least one sample after the first.
+        self.current = np.zeros((series_count, self.bucket_size), dtype=np.float32)
+        self.current_count = 0
+
+        # LTTB: completed bucket waiting for its successor before its point
+        # can be picked, and the last picked point relative to its start
+        self.waiting = None
+        self.anchor = None
+        self.anchor_x = None
+
+    def extend(self, samples: list[np.ndarray]):
+        """Add the new samples of every series (all the same length)"""
+        if not samples:
+            return
+        values = np.vstack(samples).astype(np.float32, copy=False)
+        position = 0
+        while position < values.shape[1]:
+            if self.current_count == self.bucket_size:
+                self.complete_bucket(self.current.copy())
+                self.current_count = 0
+            take = min(self.bucket_size - self.current_count, values.shape[1] - position)
+            self.current[:, self.current_count:self.current_count + take] = values[:, position:position + take]
+            self.current_count += take
+            position += take
+
+    def complete_bucket(self, bucket: np.ndarray):
+        if self.mode == "envelope":
+            for buffer, pair in zip(self.points, self.get_envelope(bucket)):
+                buffer.extend(pair)
+            return
+
+        if self.waiting is None:
+            # The very first bucket is anchored on its own first sample
+            self.anchor = bucket[:, 0].copy()
+            self.anchor_x = np.full(len(bucket), -1.0, dtype=np.float32)
+        else:
+            picked, index = self.pick_point(self.waiting, bucket.mean(axis=1), (3 * self.bucket_size - 1) / 2)
+            for buffer, value in zip(self.points, picked):
+                buffer.append(value)
+            self.anchor = picked
+            self.anchor_x = (index - self.bucket_size).astype(np.float32)
+        self.waiting = bucket
+
+    def get_envelope(self, bucket: np.ndarray) -> np.ndarray:
+        """(series, 2) min and max of each row, in the order they occurred"""
+        rows = np.arange(len(bucket))
+        low = bucket.argmin(axis=1)
+        high = bucket.argmax(axis=1)
+        first = np.where(low <= high, low, high)
+        second = np.where(low <= high, high, low)
+        return np.stack([bucket[rows, first], bucket[rows, second]], axis=1)
+
+    def pick_point(self, bucket: np.ndarray, next_y: np.ndarray, next_x: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        LTTB step for every series at once: the point of bucket forming the
+        largest triangle with the last picked point and the next bucket's mean.
+        x is relative to the start of bucket.
+        """
+        x = np.arange(bucket.shape[1], dtype=np.float32)
+        anchor_x = self.anchor_x[:, None]
+        anchor_y = self.anchor[:, None]
+        areas = np.abs(
+            (anchor_x - next_x) * (bucket - anchor_y)
+            - (anchor_x - x) * (next_y[:, None] - anchor_y)
+        )
+        index = areas.argmax(axis=1)
+        return bucket[np.arange(len(bucket)), index], index
+
+    def window(self) -> list[np.ndarray]:
+        """
+        The downsampled window of every series, oldest first, with a constant
+        length per mode. Points that were never recorded read as 0.
+        """
+        series_count = len(self.points)
+        current = self.current[:, :self.current_count]
+
+        if self.mode == "envelope":
+            if self.current_count:
+                tail = self.get_envelope(current)
+            else:
+                tail = np.zeros((series_count, 2), dtype=np.float32)
+        else:
+            tail = np.zeros((series_count, 2), dtype=np.float32)
+            if self.current_count:
+                tail[:, 1] = current[:, -1]
+                if self.waiting is not None:
+                    # Provisional point of the waiting bucket, against the
+                    # mean of what the current bucket holds so far
+                    next_x = self.bucket_size + (self.current_count - 1) / 2
+                    tail[:, 0], _ = self.pick_point(self.waiting, current.mean(axis=1), next_x)
+
+        return [
+            np.concatenate([buffer.window(buffer.capacity), tail[index]])
+            for index, buffer in enumerate(self.points)
+        ]
@@ -0,0 +1,242 @@
+"""
+Streaming export of the recorded GPU history (see HistoryStore) to CSV or
+JSONL.
+
+The export is a pipeline of generators: samples are read from the database
+cursor in (GPU, metric, time) order, optionally rolled up to minutes or
+hours, and written row by row, so memory use stays the same for an hour or
+for weeks of samples. Rolled up exports take the buckets the raw samples no
+longer cover (they are kept 14 days) from the stored rollup tables, so they
+reach as far back as those: 90 days of minutes, every hour ever recorded.
+
+Run from the StreamController data directory (the one containing plugins/):
+
+    python -m plugins.com_streamcontroller_NVIDIAPlugin.Export --start 7d --rollup 1h -o week.csv
+    python -m plugins.com_streamcontroller_NVIDIAPlugin.Export --gpu 0 --metric gpu-usage --format jsonl
+"""
+
+import argparse
+import csv
+import datetime
+import heapq
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator, TextIO
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Rollup choices of the command line, in seconds
+ROLLUPS = {"none": None, "1m": 60, "1h": 3600}
+
+# Columns of the raw and of the rolled up rows, as read_samples and roll_up yield them
+RAW_COLUMNS = ("gpu", "metric", "ts", "value")
+ROLLUP_COLUMNS = ("gpu", "metric", "ts", "count", "mean", "min", "max")
+
+# Columns of the exported records, in output order
+RAW_FIELDS = ("ts", "time", "gpu", "metric", "value")
+ROLLUP_FIELDS = ("ts", "time", "gpu", "metric", "count", "mean", "min", "max")
+
+# Suffixes of relative times such as "7d" or "12h"
+TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+# Rows fetched from SQLite at once
+FETCH_SIZE = 10000
+
+
+def get_filter(gpus: list[int], metrics: list[str]) -> tuple[str, list]:
+    """SQL conditions and parameters selecting the GPUs and metrics, all if None"""
+    sql, parameters = "", []
+    if gpus:
+        sql += f" AND gpu IN ({', '.join('?' * len(gpus))})"
+        parameters += gpus
+    if metrics:
+        sql += f" AND metric IN ({', '.join('?' * len(metrics))})"
+        parameters += metrics
+    return sql, parameters
+
+
+def fetch_all(cursor: sqlite3.Cursor) -> Iterator[tuple]:
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def read_samples(connection: sqlite3.Connection, start: float, end: float, gpus: list[int] = None,
+                 metrics: list[str] = None) -> Iterator[tuple[int, str, int, float]]:
+    """(gpu, metric, ts, value) of [start, end), ordered by GPU, metric and time"""
+    conditions, parameters = get_filter(gpus, metrics)
+    # Primary key order, so SQLite streams the rows without sorting them
+    sql = f"SELECT gpu, metric, ts, value FROM samples WHERE ts >= ? AND ts < ?{conditions} ORDER BY gpu, metric, ts"
+    return fetch_all(connection.execute(sql, [int(start), int(end)] + parameters))
+
+
+def read_rollups(connection: sqlite3.Connection, size: int, start: float, end: float, gpus: list[int] = None,
+                 metrics: list[str] = None) -> Iterator[tuple[int, str, int, int, float, float, float]]:
+    """
+    Stored (gpu, metric, bucket start, count, mean, min, max) of the buckets
+    of `size` seconds that start before end and end after start, ordered by
+    GPU, metric and time
+    """
+    conditions, parameters = get_filter(gpus, metrics)
+    sql = f"""SELECT gpu, metric, bucket, count, total / count, minimum, maximum FROM rollup_{size}
+              WHERE bucket > ? AND bucket < ?{conditions} ORDER BY gpu, metric, bucket"""
+    return fetch_all(connection.execute(sql, [int(start) - size, int(end)] + parameters))
+
+
+def get_first_sample(connection: sqlite3.Connection) -> int:
+    """Time of the oldest raw sample, None if there are none"""
+    return connection.execute("SELECT MIN(ts) FROM samples").fetchone()[0]
+
+
+def roll_up(samples: Iterable[tuple], size: int) -> Iterator[tuple[int, str, int, int, float, float, float]]:
+    """(gpu, metric, bucket start, count, mean, min, max) per bucket of `size` seconds"""
+    current = None  # (gpu, metric, bucket)
+    count = total = minimum = maximum = 0
+    for gpu, metric, ts, value in samples:
+        key = (gpu, metric, ts - ts % size)
+        if key != current:
+            if current is not None:
+                yield (*current, count, total / count, minimum, maximum)
+            current = key
+            count, total, minimum, maximum = 0, 0.0, value, value
+        count += 1
+        total += value
+        minimum = min(minimum, value)
+        maximum = max(maximum, value)
+    if current is not None:
+        yield (*current, count, total / count, minimum, maximum)
+
+
+def to_records(rows: Iterable[tuple], columns: tuple[str, ...]) -> Iterator[dict]:
+    """Raw or rolled up rows as records with an ISO 8601 UTC time column"""
+    for row in rows:
+        record = dict(zip(columns, row))
+        record["time"] = datetime.datetime.fromtimestamp(record["ts"], datetime.timezone.utc).isoformat()
+        yield record
+
+
+def write_csv(records: Iterable[dict], output: TextIO, fields: tuple[str, ...]) -> int:
+    writer = csv.DictWriter(output, fieldnames=fields)
+    writer.writeheader()
+    written = 0
+    for record in records:
+        writer.writerow(record)
+        written += 1
+    return written
+
+
+def write_jsonl(records: Iterable[dict], output: TextIO, fields: tuple[str, ...]) -> int:
+    written = 0
+    for record in records:
+        output.write(json.dumps({field: record[field] for field in fields}))
+        output.write("\n")
+        written += 1
+    return written
+
+
+def export(connection: sqlite3.Connection, output: TextIO, export_format: str = "csv", start: float = 0,
+           end: float = None, gpus: list[int] = None, metrics: list[str] = None, rollup: int = None) -> int:
+    """Write the filtered (and rolled up) history to output, return the number of records"""
+    end = end if end is not None else time.time() + 1
+    if rollup:
+        # Raw samples are rolled up from the first bucket they fully cover,
+        # older buckets are read from the rollup table of the same size
+        first = get_first_sample(connection)
+        boundary = min(end, -(-first // rollup) * rollup if first is not None else end)
+        stored = read_rollups(connection, rollup, start, boundary, gpus, metrics)
+        rolled = roll_up(read_samples(connection, max(start, boundary), end, gpus, metrics), rollup)
+        rows = heapq.merge(stored, rolled, key=lambda row: row[:3])
+        columns, fields = ROLLUP_COLUMNS, ROLLUP_FIELDS
+    else:
+        rows = read_samples(connection, start, end, gpus, metrics)
+        columns, fields = RAW_COLUMNS, RAW_FIELDS
+    writer = write_jsonl if export_format == "jsonl" else write_csv
+    return writer(to_records(rows, columns), output, fields)
+
+
+def get_coverage_note(connection: sqlite3.Connection, start: float, rollup: int = None) -> str:
+    """
+    Why the export may start later than asked: history before the oldest
+    data of the requested resolution that is only kept hourly. None if there
+    is no such history.
+    """
+    if rollup == ROLLUPS["1h"]:
+        return None
+    oldest = get_first_sample(connection)
+    if rollup == ROLLUPS["1m"]:
+        oldest_minute = connection.execute("SELECT MIN(bucket) FROM rollup_60").fetchone()[0]
+        if oldest_minute is not None:
+            oldest = min(oldest, oldest_minute) if oldest is not None else oldest_minute
+    if oldest is None or start >= oldest:
+        return None
+    # Hours that ended before the oldest data, not the one it starts in
+    if connection.execute("SELECT 1 FROM rollup_3600 WHERE bucket <= ? LIMIT 1", (oldest - 3600,)).fetchone() is None:
+        return None
+    since = datetime.datetime.fromtimestamp(oldest).isoformat(sep=" ", timespec="seconds")
+    return f"History before {since} is only kept hourly, export it with --rollup 1h"
+
+
+def parse_time(text: str) -> float:
+    """Unix time of "now", a relative time ago such as "7d" or "90m", or an ISO 8601 date"""
+    if text == "now":
+        return time.time()
+    unit = TIME_UNITS.get(text[-1:])
+    if unit is not None and text[:-1].isdigit():
+        return time.time() - int(text[:-1]) * unit
+    try:
+        # Dates without a time zone are local time
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a time: {text!r}")
+
+
+def main(argv: list[str] = None) -> int:
+    default_db = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.db")
+    parser = argparse.ArgumentParser(description="Export the recorded NVIDIA GPU history as CSV or JSONL")
+    parser.add_argument("--db", default=default_db, help="history database (default: %(default)s)")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout (default)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS,
+                        help="output format (default: from the output file extension, else csv)")
+    parser.add_argument("--gpu", type=int, action="append", help="GPU index, repeat for several (default: all)")
+    parser.add_argument("--metric", action="append", help="metric id, repeat for several (default: all)")
+    parser.add_argument("--start", type=parse_time, default=0.0,
+                        help="first time: ISO 8601 date or ago like 7d, 12h, 30m (default: everything)")
+    parser.add_argument("--end", type=parse_time, default=None, help="end time, same forms as --start (default: now)")
+    parser.add_argument("--rollup", choices=ROLLUPS, default="none",
+                        help="aggregate to count/mean/min/max per minute or hour")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"no history database at {args.db}, enable \"Record History to SQLite\" in a graph first")
+    export_format = args.format or ("jsonl" if args.output.endswith((".jsonl", ".json")) else "csv")
+
+    # Read only, the plugin may be writing at the same time (WAL)
+    connection = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        note = get_coverage_note(connection, args.start, ROLLUPS[args.rollup])
+        if note is not None:
+            print(note, file=sys.stderr)
+        if args.output == "-":
+            count = export(connection, sys.stdout, export_format, args.start, args.end, args.gpu, args.metric,
+                           ROLLUPS[args.rollup])
+        else:
+            with open(args.output, "w", newline="") as output:
+                count = export(connection, output, export_format, args.start, args.end, args.gpu, args.metric,
+                               ROLLUPS[args.rollup])
+    except BrokenPipeError:
+        # Output piped into e.g. head, which stopped reading
+        sys.stdout = open(os.devnull, "w")
+        return 1
+    finally:
+        connection.close()
+    print(f"Exported {count} records", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
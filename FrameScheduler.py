@@ -0,0 +1,541 @@
+"""
+Plugin-wide frame scheduler for graph actions.
+Samples every registered graph once per tick, renders only the graphs whose
+key is on the page currently shown, and sends all frames of a tick to the
+renderer pool in one batch per renderer, within a plugin-wide frame budget.
+Hidden graphs keep collecting samples and render once they become visible.
+
+Renderer processes are started only when a frame is first sent to them,
+from a forkserver that has the drawing libraries imported already, and
+outside the scheduler lock, so actions never wait for a renderer to boot.
+They start without the app's __main__ (StreamController's main.py and the
+UI stack it imports). A renderer that stays idle is shut down, and every
+renderer that is stopped is joined.
+
+Renderers are supervised: one that dies or misses the frame deadline is
+killed and restarted with exponential backoff, and its graphs keep their
+last good frame (or get a plain fallback frame) instead of waiting on it.
+Nothing in the scheduler ever blocks on a renderer.
+"""
+
+import dataclasses
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+
+from loguru import logger as log
+
+from plugins.com_streamcontroller_NVIDIAPlugin.MetricRegistry import GRAPHABLE_METRICS
+from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
+from plugins.com_streamcontroller_NVIDIAPlugin.PipelineStats import get_pipeline_stats
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import GraphConfig
+from plugins.com_streamcontroller_NVIDIAPlugin.Renderer import run_renderer, measure_fastest_backend
+
+# Import globals
+import globals as gl
+from src.Signals import Signals
+
+# Seconds between two samples of every graph
+SAMPLE_INTERVAL = 1.0
+
+# Time to wait after a frame request so other requests join the same batch
+BATCH_WINDOW = 0.01
+
+# Plugin-wide cap on rendered frames per second
+MAX_FRAMES_PER_SECOND = 20
+
+# build_frame result of a frame the action drew and applied itself; it
+# takes from the frame budget but nothing is sent to a renderer
+DRAWN_IN_PROCESS = (None, None)
+
+# Number of renderer processes shared by all graph actions
+RENDER_WORKERS = 2
+
+# Default seconds a renderer may stay idle before it is shut down
+RENDERER_IDLE_TIMEOUT = 60.0
+
+# Seconds to wait for a stopped renderer to exit before it is killed
+RENDERER_JOIN_TIMEOUT = 2.0
+
+# Seconds a renderer may take for a batch before it is considered hung
+RENDER_DEADLINE = 2.0
+
+# Extra seconds for the first batch of a renderer, which includes its startup
+RENDERER_STARTUP_GRACE = 5.0
+
+# Restart backoff after a renderer failure, doubling up to the maximum
+RESTART_BACKOFF_MIN = 1.0
+RESTART_BACKOFF_MAX = 60.0
+
+# Longest the clock thread sleeps, so deadlines are checked in time
+SUPERVISE_INTERVAL = 0.25
+
+# Imported once by the forkserver, so renderers start with them loaded
+RENDERER_PRELOAD = [
+    "numpy",
+    "PIL.Image",
+    "PIL.ImageDraw",
+    "matplotlib",
+    "matplotlib.backends.backend_agg",
+    "matplotlib.figure",
+    "plugins.com_streamcontroller_NVIDIAPlugin.Renderer",
+]
+
+
+def get_renderer_context():
+    """Forkserver multiprocessing context with the drawing libraries preloaded"""
+    try:
+        context = multiprocessing.get_context("forkserver")
+    except ValueError:
+        # Platforms without forkserver
+        return multiprocessing.get_context()
+    context.set_forkserver_preload(RENDERER_PRELOAD)
+    return context
+
+
+def start_renderer_process(process: multiprocessing.Process):
+    """
+    Start a process of the renderer context without the app's __main__ in its
+    preparation data. A forkserver child would otherwise re-import __main__
+    as __mp_main__, and with it the whole UI stack of StreamController.
+    """
+    main = sys.modules["__main__"]
+    spec = getattr(main, "__spec__", None)
+    path = main.__dict__.pop("__file__", None)
+    main.__spec__ = None
+    try:
+        process.start()
+    finally:
+        main.__spec__ = spec
+        if path is not None:
+            main.__file__ = path
+
+
+class FrameSlot:
+    """Scheduling state of one graph action"""
+
+    def __init__(self, action, session_id: int, worker: int):
+        self.action = action
+        self.session_id = session_id
+        self.worker = worker  # Index of the renderer this action is pinned to
+        self.dirty = False  # New data or settings since the last frame
+        self.force = False  # Re-apply the image even if nothing changed
+        self.in_flight = False  # A frame was sent and its result is pending
+        self.deadline = 0.0  # When the pending frame is given up on
+        self.visible = False  # Visibility seen at the last flush
+        self.requested_at = 0.0  # Oldest unserved request, for fair ordering
+
+
+class RendererProcess:
+    """One running renderer process with its own queues"""
+
+    def __init__(self, context, worker: int):
+        self.worker = worker
+        # A result queue per renderer: a renderer killed while writing can
+        # only break its own queue
+        self.task_queue = context.Queue()
+        self.result_queue = context.Queue()
+        self.process = context.Process(target=run_renderer, args=(self.task_queue, self.result_queue),
+                                       daemon=True, name=f"GraphCreator-{worker}")
+        start_renderer_process(self.process)
+        self.started_at = time.monotonic()
+        self.last_used = self.started_at  # Last dispatch or result
+        self.answered = False  # Sent at least one result, so it is past startup
+
+    def stop(self, kill: bool = False):
+        """Stop the process and join it, killing it if it does not exit in time"""
+        if not kill:
+            try:
+                self.task_queue.put(("stop", None))
+            except (OSError, ValueError):
+                pass
+            self.process.join(RENDERER_JOIN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.task_queue.close()
+        # Lets the receiving thread exit
+        self.result_queue.put(None)
+
+
+class FrameScheduler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.slots: dict[int, FrameSlot] = {}  # Session id -> slot
+        self.session_ids = itertools.count(1)
+        self.next_worker = 0
+        self.running = True
+
+        # Token bucket for the frame budget
+        self.tokens = float(MAX_FRAMES_PER_SECOND)
+        self.last_refill = time.monotonic()
+
+        self.stats = get_pipeline_stats()
+        self.context = get_renderer_context()
+        self.idle_timeout = RENDERER_IDLE_TIMEOUT
+        self.history_store = None  # Records every graphable metric of every GPU when set
+        self.fastest_backend = None  # Measured on the first full redraw with the "auto" backend
+
+        # Renderers by worker index, None while not running (guarded by lock)
+        self.renderers: list = [None] * RENDER_WORKERS
+        self.starting = [False] * RENDER_WORKERS  # Being started outside the lock
+        self.backoff = [0.0] * RENDER_WORKERS  # Current restart backoff per worker
+        self.restart_at = [0.0] * RENDER_WORKERS  # No restart before this time
+        self.restarts = [0] * RENDER_WORKERS  # Restarts after a failure per worker
+        self.failures = {"died": 0, "timed out": 0}
+
+        self.clock_thread = threading.Thread(target=self.run, daemon=True, name="FrameScheduler")
+        self.clock_thread.start()
+
+        gl.signal_manager.connect_signal(Signals.AppQuit, self.stop)
+
+    def get_renderer(self, worker: int) -> RendererProcess:
+        """Running renderer of a worker, started if needed; None while backing off"""
+        with self.lock:
+            renderer = self.renderers[worker]
+            if renderer is not None:
+                renderer.last_used = time.monotonic()
+                return renderer
+            if self.starting[worker] or not self.running or time.monotonic() < self.restart_at[worker]:
+                return None
+            if self.restart_at[worker]:
+                self.restarts[worker] += 1
+                self.restart_at[worker] = 0.0
+            self.starting[worker] = True
+
+        # Booting the forkserver and the process takes a while; register,
+        # unregister and request_frame must not wait for it
+        try:
+            renderer = RendererProcess(self.context, worker)
+        finally:
+            with self.lock:
+                self.starting[worker] = False
+        with self.lock:
+            running = self.running
+            if running:
+                self.renderers[worker] = renderer
+        if not running:
+            # Stopped meanwhile
+            renderer.stop()
+            return None
+        threading.Thread(target=self.receive_results, args=(renderer,), daemon=True,
+                         name=f"GraphResults-{worker}").start()
+        return renderer
+
+    def is_available(self, worker: int) -> bool:
+        """Whether frames can be sent to a worker now (it is not backing off)"""
+        with self.lock:
+            return self.renderers[worker] is not None or time.monotonic() >= self.restart_at[worker]
+
+    def resolve_render_backend(self, config: GraphConfig) -> GraphConfig:
+        """
+        The config with the "auto" backend replaced by the fastest one. It is
+        measured once for the whole plugin (on the clock thread, which builds
+        every frame message), so all renderer processes draw with the same
+        backend and none renders test frames when it starts.
+        """
+        if config.render_backend != "auto" or config.scrolling_render:
+            return config
+        if self.fastest_backend is None:
+            self.fastest_backend = measure_fastest_backend()
+            log.info(f"Fastest graph render backend: {self.fastest_backend}")
+        return dataclasses.replace(config, render_backend=self.fastest_backend)
+
+    def set_idle_timeout(self, seconds: float):
+        """Seconds an unused renderer keeps running, 0 to never shut it down"""
+        self.idle_timeout = seconds
+
+    def set_history_store(self, store):
+        """HistoryStore fed with a snapshot of every GPU per tick, None to stop recording"""
+        self.history_store = store
+
+    def stop_idle_workers(self):
+        """Shut down renderers that had nothing to do for the idle timeout"""
+        if self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        with self.lock:
+            idle = [
+                worker for worker, renderer in enumerate(self.renderers)
+                if renderer is not None and now - renderer.last_used > self.idle_timeout
+                and not any(slot.in_flight for slot in self.slots.values() if slot.worker == worker)
+            ]
+        for worker in idle:
+            self.stop_worker(worker)
+
+    def stop_worker(self, worker: int, kill: bool = False):
+        """Stop and join one renderer; its graphs reconfigure on the next frame"""
+        with self.lock:
+            renderer = self.renderers[worker]
+            self.renderers[worker] = None
+            actions = [slot.action for slot in self.slots.values() if slot.worker == worker]
+        if renderer is None:
+            return
+        for action in actions:
+            # The renderer's session state is gone
+            action.reset_renderer_session()
+        renderer.stop(kill)
+
+    def supervise(self):
+        """Restart renderers that died or missed the deadline of a frame"""
+        now = time.monotonic()
+        with self.lock:
+            failed = {}
+            for worker, renderer in enumerate(self.renderers):
+                if renderer is not None and not renderer.process.is_alive():
+                    failed[worker] = "died"
+            for slot in self.slots.values():
+                if slot.in_flight and now > slot.deadline and slot.worker not in failed:
+                    failed[slot.worker] = "timed out"
+        for worker, reason in failed.items():
+            self.fail_worker(worker, reason)
+
+    def fail_worker(self, worker: int, reason: str):
+        """Kill a failed renderer, schedule its restart and give its graphs a fallback frame"""
+        self.stop_worker(worker, kill=True)
+        with self.lock:
+            self.failures[reason] += 1
+            self.backoff[worker] = min(RESTART_BACKOFF_MAX, max(RESTART_BACKOFF_MIN, self.backoff[worker] * 2))
+            self.restart_at[worker] = time.monotonic() + self.backoff[worker]
+            failed = [slot for slot in self.slots.values() if slot.worker == worker and slot.in_flight]
+            for slot in failed:
+                slot.in_flight = False
+                self.mark_dirty(slot)
+        log.warning(f"Graph renderer {worker} {reason}, restarting in {self.backoff[worker]:.0f} s")
+        for slot in failed:
+            slot.action.on_frame_failed()
+
+    def get_supervisor_stats(self) -> dict:
+        """Renderer failure and restart counters"""
+        with self.lock:
+            return {
+                "died": self.failures["died"],
+                "timed out": self.failures["timed out"],
+                "restarts": list(self.restarts),
+                "running": [renderer is not None for renderer in self.renderers],
+            }
+
+    def register(self, action) -> int:
+        """Start scheduling frames for a graph action and return its session id"""
+        with self.lock:
+            session_id = next(self.session_ids)
+            worker = self.next_worker
+            self.next_worker = (self.next_worker + 1) % RENDER_WORKERS
+            self.slots[session_id] = FrameSlot(action, session_id, worker)
+        return session_id
+
+    def unregister(self, action):
+        with self.lock:
+            slot = self.slots.pop(action.session_id, None)
+            renderer = self.renderers[slot.worker] if slot is not None else None
+        if renderer is not None and self.running:
+            renderer.task_queue.put(("close", slot.session_id))
+
+    def request_frame(self, action, force: bool = False):
+        """Ask for a new frame of the action; it is rendered at the next flush"""
+        with self.lock:
+            slot = self.slots.get(action.session_id)
+            if slot is None:
+                return
+            self.mark_dirty(slot)
+            slot.force = slot.force or force
+        self.wakeup.set()
+
+    def mark_dirty(self, slot: FrameSlot):
+        # Caller holds the lock
+        if slot.dirty:
+            if slot.visible:
+                # The previous request was never rendered, the newest data wins
+                slot.action.count_frame("coalesced")
+        else:
+            slot.dirty = True
+            slot.requested_at = time.monotonic()
+
+    def run(self):
+        next_sample = time.monotonic()
+        while self.running:
+            timeout = min(next_sample - time.monotonic(), SUPERVISE_INTERVAL)
+            if self.wakeup.wait(max(0.0, timeout)):
+                self.wakeup.clear()
+                time.sleep(BATCH_WINDOW)
+            if not self.running:
+                break
+
+            now = time.monotonic()
+            if now >= next_sample:
+                # Don't try to catch up on missed ticks
+                next_sample = max(next_sample + SAMPLE_INTERVAL, now)
+                self.sample_all()
+            try:
+                self.supervise()
+                self.flush()
+            except Exception as e:
+                log.error(f"Failed to dispatch graph frames: {e}")
+            self.stop_idle_workers()
+            self.stats.maybe_log()
+
+    def sample_all(self):
+        """Collect one sample for every graph, visible or not"""
+        with self.lock:
+            slots = list(self.slots.values())
+
+        # Read the union of all metrics in use once; the graphs then sample
+        # from the monitors' current readings
+        sampled: dict[int, set[str]] = {}
+        for slot in slots:
+            try:
+                for index, metric in slot.action.get_sampled_metrics():
+                    sampled.setdefault(index, set()).add(metric)
+            except Exception as e:
+                log.error(f"Failed to collect graph metrics: {e}")
+        store = self.history_store
+        if store is not None:
+            for index in range(max(1, get_nvidia_monitor().get_device_count())):
+                sampled.setdefault(index, set()).update(GRAPHABLE_METRICS)
+        for index, metrics in sampled.items():
+            get_nvidia_monitor(index).refresh(metrics)
+        if store is not None:
+            now = time.time()
+            for index in sampled:
+                store.record(index, get_nvidia_monitor(index).get_snapshot(GRAPHABLE_METRICS), now)
+
+        for slot in slots:
+            try:
+                slot.action.sample()
+            except Exception as e:
+                log.error(f"Failed to collect graph sample: {e}")
+        with self.lock:
+            for slot in slots:
+                self.mark_dirty(slot)
+
+    def flush(self):
+        """Build the frames of all visible dirty graphs and dispatch them in one batch"""
+        now = time.monotonic()
+        with self.lock:
+            self.tokens = min(float(MAX_FRAMES_PER_SECOND),
+                              self.tokens + (now - self.last_refill) * MAX_FRAMES_PER_SECOND)
+            self.last_refill = now
+            candidates = sorted(
+                (slot for slot in self.slots.values() if slot.dirty and not slot.in_flight),
+                key=lambda slot: slot.requested_at
+            )
+
+        batches: dict[int, tuple[list, bytearray, list]] = {}
+        for slot in candidates:
+            visible = slot.action.is_visible()
+            became_visible = visible and not slot.visible
+            slot.visible = visible
+            if not visible:
+                # Stay dirty, render once the page is shown
+                continue
+            if not self.is_available(slot.worker):
+                # Renderer is backing off after a failure, keep the last frame
+                continue
+            if self.tokens < 1:
+                # Out of budget, the remaining graphs wait for the next flush
+                break
+
+            with self.lock:
+                force = slot.force or became_visible
+                slot.dirty = False
+                slot.force = False
+            message = slot.action.build_frame(force=force)
+            if message is None:
+                continue
+            if message is DRAWN_IN_PROCESS:
+                with self.lock:
+                    self.tokens -= 1
+                continue
+            configure, record = message
+
+            with self.lock:
+                slot.in_flight = True
+                self.tokens -= 1
+            slot.action.count_frame("submitted")
+            configures, records, slots = batches.setdefault(slot.worker, ([], bytearray(), []))
+            if configure is not None:
+                configures.append(configure)
+            records += record
+            slots.append(slot)
+
+        for worker, (configures, records, slots) in batches.items():
+            renderer = self.get_renderer(worker)
+            if renderer is None:
+                # Stopped meanwhile, render these again later
+                with self.lock:
+                    for slot in slots:
+                        slot.in_flight = False
+                        self.mark_dirty(slot)
+                for slot in slots:
+                    slot.action.reset_renderer_session()
+                continue
+
+            sent_at = time.monotonic()
+            deadline = sent_at + RENDER_DEADLINE
+            if not renderer.answered:
+                deadline += RENDERER_STARTUP_GRACE
+            with self.lock:
+                for slot in slots:
+                    slot.deadline = deadline
+            renderer.task_queue.put(("render", (configures, bytes(records), sent_at)))
+
+    def receive_results(self, renderer: RendererProcess):
+        """Apply the images of one renderer as they arrive"""
+        while True:
+            try:
+                message = renderer.result_queue.get()
+            except Exception:
+                # Queue broken by a killed renderer
+                break
+            if message is None:
+                break
+            with self.lock:
+                if self.renderers[renderer.worker] is not renderer:
+                    # Renderer was replaced, its frames were already given up on
+                    break
+                renderer.answered = True
+                renderer.last_used = time.monotonic()
+                self.backoff[renderer.worker] = 0.0
+
+            _, frames, timings, sent_at, batch_seconds = message
+            self.stats.record_many(timings)
+            self.stats.record("ipc", time.monotonic() - sent_at - batch_seconds)
+
+            pending = False
+            for session_id, image in frames:
+                with self.lock:
+                    slot = self.slots.get(session_id)
+                    if slot is None or not slot.in_flight:
+                        # Action was removed or its frame given up on meanwhile
+                        continue
+                    slot.in_flight = False
+                    pending = pending or slot.dirty
+                slot.action.on_frame_rendered(image)
+
+            if pending:
+                self.wakeup.set()
+
+    def stop(self, *args):
+        if not self.running:
+            return
+        self.running = False
+        self.wakeup.set()
+        for worker in range(RENDER_WORKERS):
+            self.stop_worker(worker)
+        if self.history_store is not None:
+            # Write the last batch
+            self.history_store.close()
+
+
+# Singleton instance
+_frame_scheduler_instance = None
+
+def get_frame_scheduler() -> FrameScheduler:
+    """Get or create the singleton frame scheduler"""
+    global _frame_scheduler_instance
+    if _frame_scheduler_instance is None:
+        _frame_scheduler_instance = FrameScheduler()
+    return _frame_scheduler_instance
@@ -1,19 +1,28 @@
 """
-Base class for graph actions with support for single and dual-line graphs.
-Handles graph rendering in a separate process for non-blocking updates.
+Base class for graph actions showing any number of metric series.
+Frames are drawn by renderer processes running Renderer.py, for
+non-blocking updates.
+
+Frames are scheduled by the plugin-wide FrameScheduler: it collects a sample
+from every graph each tick, asks visible graphs for a frame via build_frame
+and hands finished images back through on_frame_rendered. Nothing here ever
+waits on the renderer.
+
+Actions with RENDERS_IN_PROCESS draw their frames in this process instead,
+from layers returned by render_layers, with windows downsampled
+incrementally as samples arrive.
 """
 
 from src.backend.PluginManager.ActionBase import ActionBase
+from src.backend.DeckManagement.InputIdentifier import Input, InputEvent
 
-import matplotlib.pyplot as plt
-import matplotlib
-from multiprocessing import Process, Queue
-# Use non-interactive backend to prevent errors with multiprocessing
-matplotlib.use('agg')
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from PIL import Image
-import io
+from PIL import Image, ImageFont
+import dataclasses
+import functools
 import os
+import threading
+import time
+import numpy as np
 
 # Import gtk
 import gi
@@ -21,218 +30,629 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Gtk, Adw, Gdk
 
-# Import globals
-import globals as gl
-from src.Signals import Signals
-
-# Maximum number of data points to retain
-MAX_DATA_POINTS = 120
+from plugins.com_streamcontroller_NVIDIAPlugin.BackgroundCache import get_background
+from plugins.com_streamcontroller_NVIDIAPlugin.Downsample import Downsampler, get_bucket_size, DOWNSAMPLE_MODES
+from plugins.com_streamcontroller_NVIDIAPlugin.FrameScheduler import (
+    get_frame_scheduler, DRAWN_IN_PROCESS, RENDERER_IDLE_TIMEOUT
+)
+from plugins.com_streamcontroller_NVIDIAPlugin.HistoryStore import get_history_store, close_history_store
+from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
+from plugins.com_streamcontroller_NVIDIAPlugin.RingBuffer import RingBuffer
+from plugins.com_streamcontroller_NVIDIAPlugin.RendererProtocol import pack_frame
+from plugins.com_streamcontroller_NVIDIAPlugin.Renderer import (
+    MAX_DATA_POINTS, GRAPH_SIZE, GRAPH_LOGO_OPACITY, RENDER_BACKENDS
+)
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import (
+    GraphConfig, GRAPH_METRICS, DEFAULT_LINE_COLORS, DEFAULT_FILL_COLORS, DEFAULT_TIME_PERIOD
+)
+from plugins.com_streamcontroller_NVIDIAPlugin.PipelineStats import get_pipeline_stats
+
+# Data is quantized to this many percent before fingerprinting a frame, so
+# changes below the visible resolution of a key do not trigger a render
+FINGERPRINT_RESOLUTION = 0.5
+
+# History database in the plugin directory, written when "Record History" is on
+HISTORY_DB = "history.db"
+
+# Time periods the dial steps through, in seconds
+ZOOM_PERIODS = (15, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size: int) -> ImageFont.ImageFont:
+    """Default font at a pixel size, for text drawn in this process"""
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 has a single bitmap size
+        return ImageFont.load_default()
 
 
 class GraphBase(ActionBase):
+    # Metrics shown by the graph, one series each; set in subclasses
+    SERIES: tuple[str, ...] = ("gpu-usage",)
+
+    # Frames are drawn in this process by render_layers instead of a renderer process
+    RENDERS_IN_PROCESS = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.percentages_1: list[float] = []  # First line data
-        self.percentages_2: list[float] = []  # Second line data (optional)
-        self.single_line_mode = False  # Set to True in subclasses for single-line graphs
+        self.history: dict[str, RingBuffer] = {}  # Metric -> samples of the configured and the shown metrics
+        self.monitor = get_nvidia_monitor()
         
         # Store plugin directory path for accessing assets
         self.plugin_dir = self.plugin_base.PATH
 
-        self.task_queue = Queue()
-        self.result_queue = Queue()
-        self.process = GraphCreator(task_queue=self.task_queue, result_queue=self.result_queue)
-        self.process.start()
-
-        gl.signal_manager.connect_signal(Signals.AppQuit, self.stop_process)
+        # Frame state (guarded by frame_lock)
+        self.frame_lock = threading.Lock()
+        self.frame_stats = {
+            "submitted": 0,  # Jobs handed to the renderer
+            "rendered": 0,  # Images applied via set_media
+            "coalesced": 0,  # Requests replaced by newer data before rendering
+            "dropped": 0,  # Jobs whose result was unusable (render error)
+            "skipped": 0,  # Frames identical to the last one, not rendered at all
+            "failed": 0,  # Jobs lost to a renderer that died or missed the deadline
+        }
+        self.last_fingerprint = None  # Fingerprint of the last submitted frame
+        self.last_image = None  # Last image applied via set_media
+
+        # Compiled settings, rebuilt only by the on_*_change handlers. The
+        # lock serializes compiling with invalidating, so a config compiled
+        # from old settings or an old view never outlives its invalidation
+        self.config_lock = threading.Lock()
+        self.render_config: GraphConfig = None
+        self.render_config_version = 0
+
+        # View chosen with the dial (guarded by config_lock); not stored in the settings
+        # and reset by save_settings, so a changed setting always shows
+        self.view_period = None  # Zoomed time period, None for the configured one
+        self.view_index = 0  # Index into get_metric_views(), 0 for the configured metrics
+
+        # Downsampled series of in-process frames, rebuilt when the config version changes
+        self.downsampler: Downsampler = None
+        self.downsampler_version = None
+
+        # Renderer session state, see RendererProtocol
+        self.renderer_version = None  # Config version the session was configured with, None to reconfigure
+        self.sent_samples = 0  # RingBuffer.total of the first series when the session was last updated
+
+        get_pipeline_stats().set_log_enabled(self.plugin_base.get_settings().get("log-pipeline-timings", False))
+
+        self.scheduler = get_frame_scheduler()
+        self.scheduler.set_idle_timeout(
+            self.plugin_base.get_settings().get("renderer-idle-timeout", RENDERER_IDLE_TIMEOUT)
+        )
+        self.apply_history_store(self.plugin_base.get_settings().get("history-store", False))
+        self.session_id = self.scheduler.register(self)
+
+    def apply_history_store(self, enabled: bool):
+        """Start or stop recording history to the plugin-wide SQLite store"""
+        if enabled:
+            self.scheduler.set_history_store(get_history_store(os.path.join(self.plugin_dir, HISTORY_DB)))
+        elif self.scheduler.history_store is not None:
+            self.scheduler.set_history_store(None)
+            close_history_store()
+
+    def backfill_history(self, buffers: dict[tuple[int, str], RingBuffer], length: int = None):
+        """
+        Append the last `length` seconds to the buffers of (GPU index, metric),
+        from the history store when it is enabled and as zeros otherwise.
+        Without a length, as far back as the store has samples (e.g. after a
+        restart).
+        """
+        store = self.scheduler.history_store
+        end = int(time.time())
+        rows = {}
+        if store is not None:
+            start = end - (length if length is not None else MAX_DATA_POINTS)
+            rows = {key: store.query(key[0], key[1], start, end) for key in buffers}
+        if length is None:
+            first = min((key_rows[0][0] for key_rows in rows.values() if key_rows), default=end)
+            length = end - first
+
+        # Seconds without samples read as 0
+        start = end - length
+        for key, buffer in buffers.items():
+            values = np.zeros(length, dtype=np.float32)
+            for ts, _, mean, _, _ in rows.get(key, ()):
+                values[ts - start] = mean
+            buffer.extend(values)
+
+    def sample(self):
+        """Called by the scheduler every tick, even while the key is hidden"""
+        self.collect_sample()
+
+    def collect_sample(self):
+        """Append the newest value of every retained metric"""
+        config = self.get_render_config()  # Makes sure the retained metrics have their buffers
+        snapshot = self.monitor.get_snapshot(self.history)
+        for metric, buffer in self.history.items():
+            buffer.append(float(snapshot[metric]))
+        self.update_downsampler(config)
+
+    def get_sampled_metrics(self) -> set[tuple[int, str]]:
+        """(GPU index, metric) of everything collect_sample reads"""
+        self.get_render_config()
+        return {(self.monitor.index, metric) for metric in self.history}
+
+    def get_history(self, metric: str) -> RingBuffer:
+        buffer = self.history.get(metric)
+        if buffer is None:
+            buffer = RingBuffer(MAX_DATA_POINTS)
+            self.history[metric] = buffer
+        return buffer
+
+    def is_visible(self) -> bool:
+        """Whether the key is on the page currently shown on its deck"""
+        try:
+            return self.get_is_present()
+        except AttributeError:
+            return True
+
+    def get_series_metrics(self, settings: dict) -> list[str]:
+        """Metrics to show, in drawing order"""
+        return list(self.SERIES)
+
+    def get_metric_views(self, metrics: list[str]) -> list[list[str]]:
+        """
+        Metric sets the dial press cycles through, the configured ones first.
+        A single metric cycles through every metric, several metrics through
+        each of them alone.
+        """
+        if len(metrics) == 1:
+            others = [metric for metric in GRAPH_METRICS if metric != metrics[0]]
+            return [metrics] + [[metric] for metric in others]
+        return [metrics] + [[metric] for metric in metrics]
+
+    def get_full_scale(self, metric: str) -> float:
+        scale = GRAPH_METRICS[metric][2]
+        if scale is None:
+            # Only power has a device dependent scale
+            scale = self.monitor.get_power_limit_watts() or 100
+        return scale
+
+    def get_series(self) -> list[RingBuffer]:
+        """History buffers that are sent to the renderer"""
+        return [self.get_history(style.metric) for style in self.get_render_config().series]
+
+    def get_render_config(self) -> GraphConfig:
+        config = self.render_config
+        if config is None:
+            with self.config_lock:
+                config = self.render_config
+                if config is None:
+                    config = self.compile_render_config()
+        return config
+
+    def compile_render_config(self) -> GraphConfig:
+        # Caller holds config_lock
+        self.render_config_version += 1
+        settings = self.get_settings()
+        views = self.get_metric_views(self.get_series_metrics(settings))
+        metrics = views[self.view_index % len(views)]
+        scales = {metric: self.get_full_scale(metric) for metric in metrics}
+        config = GraphConfig.from_settings(settings, self.render_config_version, metrics, scales)
+        if self.view_period is not None:
+            config = dataclasses.replace(config, time_period=self.view_period)
+        self.render_config = config
+        self.retain_history(set(views[0]) | set(metrics))
+        return config
+
+    def invalidate_render_config(self):
+        """Recompile the render config on next use, after a compile in progress"""
+        with self.config_lock:
+            self.render_config = None
+
+    def retain_history(self, retained: set[str]):
+        """
+        Keep history of the configured and the shown metrics only, so nothing
+        else is sampled. A newly retained metric (e.g. after a dial press)
+        gets a buffer as long as the others, backfilled from the history
+        store; the other buffers are left alone.
+        """
+        for metric in list(self.history):
+            if metric not in retained:
+                del self.history[metric]
+        added = [metric for metric in retained if metric not in self.history]
+        if not added:
+            return
+        length = max((len(buffer) for buffer in self.history.values()), default=0)
+        index = self.monitor.index
+        if length:
+            self.backfill_history({(index, metric): self.get_history(metric) for metric in added}, length)
+        else:
+            # Nothing sampled yet, all series start from the store
+            self.backfill_history({(index, metric): self.get_history(metric) for metric in retained})
+
+    def event_callback(self, event: InputEvent, data: dict = None):
+        if event == Input.Dial.Events.TURN_CW:
+            self.zoom(1)
+        elif event == Input.Dial.Events.TURN_CCW:
+            self.zoom(-1)
+        elif event == Input.Dial.Events.SHORT_UP:
+            self.cycle_metrics()
+        else:
+            super().event_callback(event, data)
+
+    def zoom(self, steps: int):
+        """
+        Step the time period through ZOOM_PERIODS. Only the view changes: the
+        frame is rendered from the retained history, and detents arriving
+        before the next flush coalesce into one frame.
+        """
+        with self.config_lock:
+            # Runs on the input thread: only the view changes here, the
+            # scheduler compiles the config
+            period = self.view_period or self.get_settings().get("time-period", DEFAULT_TIME_PERIOD)
+            index = min(range(len(ZOOM_PERIODS)), key=lambda i: abs(ZOOM_PERIODS[i] - period))
+            index = max(0, min(len(ZOOM_PERIODS) - 1, index + steps))
+            if ZOOM_PERIODS[index] == period:
+                return
+            self.view_period = ZOOM_PERIODS[index]
+            self.render_config = None
+        self.show_graph()
 
-    def stop_process(self, *args):
-        self.task_queue.put((None, None, None, None, None))
+    def cycle_metrics(self):
+        """Show the next metric set of get_metric_views()"""
+        with self.config_lock:
+            self.view_index += 1
+            self.render_config = None
+        self.show_graph()
 
-    def set_percentages_length(self, length: int):
-        """Ensure data lists have the correct length, capped at MAX_DATA_POINTS"""
-        length = min(length, MAX_DATA_POINTS)
+    def save_settings(self, settings: dict):
+        """Store changed settings, return to the configured view and redraw"""
+        self.set_settings(settings)
+        with self.config_lock:
+            self.view_period = None
+            self.view_index = 0
+            self.render_config = None
+        self.show_graph()
 
-        # First line
-        if len(self.percentages_1) > length:
-            self.percentages_1 = self.percentages_1[-length:]
-        elif len(self.percentages_1) < length:
-            self.percentages_1 = [0] * (length - len(self.percentages_1)) + self.percentages_1
-        
-        # Second line
-        if len(self.percentages_2) > length:
-            self.percentages_2 = self.percentages_2[-length:]
-        elif len(self.percentages_2) < length:
-            self.percentages_2 = [0] * (length - len(self.percentages_2)) + self.percentages_2
+    def get_frame_fingerprint(self, config: GraphConfig) -> int:
+        """Cheap hash of everything that affects the rendered image"""
+        scale = 1 / FINGERPRINT_RESOLUTION
+        return hash((
+            tuple(np.rint(series.window(config.time_period) * scale).astype(np.int16).tobytes()
+                  for series in self.get_series()),
+            config.version,
+            GRAPH_SIZE,
+        ))
+
+    def get_frame_message(self, config: GraphConfig) -> tuple:
+        """
+        Return (configure, frame record) for the renderer session.
+        configure is None unless the session needs (re)configuring, in which
+        case it carries the full history and the record carries no samples.
+        """
+        series = self.get_series()
+        total = series[0].total
+
+        configure = None
+        if config.version != self.renderer_version:
+            self.renderer_version = config.version
+            history = [buffer.window(buffer.capacity).tobytes() for buffer in series]
+            configure = (self.session_id, self.scheduler.resolve_render_backend(config), self.plugin_dir, history)
+            new_samples = 0
+        else:
+            new_samples = min(total - self.sent_samples, MAX_DATA_POINTS)
 
-    def get_graph(self) -> Image:
-        settings = self.get_settings()
-        time_period = settings.get("time-period", 15)
-        self.set_percentages_length(time_period)
-        
-        # Pass settings, data, single_line_mode, and plugin_dir
-        self.task_queue.put((settings, self.percentages_1, self.percentages_2, self.single_line_mode, self.plugin_dir))
+        self.sent_samples = total
+        return configure, pack_frame(self.session_id, config.version,
+                                     [buffer.window(new_samples) for buffer in series])
 
-        img = self.result_queue.get()
-        return img
+    def render_layers(self, config: GraphConfig) -> list[Image.Image]:
+        """Layers of a frame, bottom first; implemented by RENDERS_IN_PROCESS actions"""
+        raise NotImplementedError
 
-    def show_graph(self):
-        image = self.get_graph()
+    def render_in_process(self, config: GraphConfig):
+        """Draw the frame right here and apply it"""
+        stats = get_pipeline_stats()
+        try:
+            start = time.perf_counter()
+            layers = self.render_layers(config)
+            stats.record("render", time.perf_counter() - start)
+
+            image = layers[0]
+            if len(layers) > 1:
+                start = time.perf_counter()
+                image = Image.alpha_composite(layers[0], layers[1])
+                for layer in layers[2:]:
+                    image.alpha_composite(layer)
+                stats.record("composite", time.perf_counter() - start)
+        except Exception:
+            image = None
+        self.on_frame_rendered(image)
+
+    def get_logo_background(self, size: tuple[int, int]) -> Image.Image:
+        """Shared logo background of in-process frames, plain black without the logo"""
+        background = get_background(self.plugin_dir, size, GRAPH_LOGO_OPACITY)
+        if background is None:
+            background = Image.new("RGBA", size, (0, 0, 0, 255))
+        return background
+
+    def get_downsampler(self, config: GraphConfig, columns: int) -> Downsampler:
+        """
+        Downsampler of get_series() for windows `columns` points wide, rebuilt
+        from history when the config changed; None if the period fits
+        """
+        if self.downsampler_version != config.version:
+            self.downsampler_version = config.version
+            self.downsampler = None
+            if get_bucket_size(config.time_period, columns) > 1:
+                series = self.get_series()
+                self.downsampler = Downsampler(config.downsample_mode, len(series), config.time_period, columns)
+                self.downsampler.extend([buffer.window(len(buffer)) for buffer in series])
+        return self.downsampler
+
+    def get_downsampled_windows(self, config: GraphConfig, columns: int) -> list[np.ndarray]:
+        """Window of every series, downsampled to at most `columns` points"""
+        downsampler = self.get_downsampler(config, columns)
+        if downsampler is not None:
+            return downsampler.window()
+        return [buffer.window(config.time_period) for buffer in self.get_series()]
+
+    def update_downsampler(self, config: GraphConfig):
+        """Feed the newest sample of every series to the downsampler of the current config"""
+        if self.downsampler is not None and self.downsampler_version == config.version:
+            self.downsampler.extend([buffer.window(1) for buffer in self.get_series()])
+
+    def reset_renderer_session(self):
+        """Send the full configuration and history with the next frame"""
+        self.renderer_version = None
+
+    def show_graph(self, force: bool = False):
+        """
+        Request a new frame from the scheduler without waiting for it.
+        force re-applies the last image even if nothing changed
+        (e.g. when the key becomes visible again).
+        """
+        self.scheduler.request_frame(self, force=force)
+
+    def build_frame(self, force: bool = False):
+        """
+        Return the renderer message for the current data, DRAWN_IN_PROCESS
+        if a RENDERS_IN_PROCESS action drew it already, or None if the frame
+        would be identical to the last one.
+        """
+        config = self.get_render_config()
+        fingerprint = self.get_frame_fingerprint(config)
+        with self.frame_lock:
+            unchanged = fingerprint == self.last_fingerprint
+            if unchanged:
+                self.frame_stats["skipped"] += 1
+            else:
+                self.last_fingerprint = fingerprint
+            last_image = self.last_image
+
+        if not unchanged:
+            if self.RENDERS_IN_PROCESS:
+                self.render_in_process(config)
+                return DRAWN_IN_PROCESS
+            return self.get_frame_message(config)
+        if force and last_image is not None:
+            self.set_media(image=last_image)
+        return None
+
+    def on_frame_rendered(self, image: Image):
         if image is None:
+            with self.frame_lock:
+                self.frame_stats["dropped"] += 1
+                # Make sure the next tick renders again, with a fresh session
+                self.last_fingerprint = None
+                self.reset_renderer_session()
             return
+
+        with self.frame_lock:
+            self.frame_stats["rendered"] += 1
+            self.last_image = image
+        start = time.perf_counter()
         self.set_media(image=image)
+        get_pipeline_stats().record("set_media", time.perf_counter() - start)
+
+    def on_frame_failed(self):
+        """The renderer died or hung; keep the last frame, or show the plain background"""
+        with self.frame_lock:
+            self.frame_stats["failed"] += 1
+            self.last_fingerprint = None
+            self.reset_renderer_session()
+            last_image = self.last_image
+        if last_image is None:
+            # Cheap fallback so the key is not left blank until the restart
+            fallback = get_background(self.plugin_dir, (GRAPH_SIZE, GRAPH_SIZE), GRAPH_LOGO_OPACITY)
+            if fallback is not None:
+                self.set_media(image=fallback)
+
+    def count_frame(self, counter: str):
+        with self.frame_lock:
+            self.frame_stats[counter] += 1
+
+    def get_frame_stats(self) -> dict:
+        """Return a copy of the per-action frame counters"""
+        with self.frame_lock:
+            return dict(self.frame_stats)
+
+    def get_color_slots(self) -> list[tuple[int, str]]:
+        """(series index, label) of the series whose colors can be configured"""
+        return [(index, GRAPH_METRICS[metric][0]) for index, metric in enumerate(self.SERIES)]
 
     def get_config_rows(self) -> list:
-        # Line 1 color
-        self.line1_color_row = ColorRow()
-        self.line1_color_row.color_label.set_label("Line 1 Color:")
-
-        # Line 1 fill color
-        self.fill1_color_row = ColorRow()
-        self.fill1_color_row.color_label.set_label("Line 1 Fill:")
-
-        # Line 2 color
-        self.line2_color_row = ColorRow()
-        self.line2_color_row.color_label.set_label("Line 2 Color:")
-
-        # Line 2 fill color
-        self.fill2_color_row = ColorRow()
-        self.fill2_color_row.color_label.set_label("Line 2 Fill:")
+        # Line and fill color of every series
+        self.color_rows = []
+        color_slots = self.get_color_slots()
+        for index, label in color_slots:
+            line_row = ColorRow()
+            line_row.color_label.set_label(f"{label} Line Color:")
+            fill_row = ColorRow()
+            fill_row.color_label.set_label(f"{label} Fill:")
+            self.color_rows.append((index, line_row, fill_row))
 
         # Line width
         self.line_width_row = Adw.SpinRow.new_with_range(1, 10, 1)
         self.line_width_row.set_title("Line Width:")
 
         # Time period
-        self.time_period_row = Adw.SpinRow.new_with_range(5, 60, 1)
+        self.time_period_row = Adw.SpinRow.new_with_range(5, MAX_DATA_POINTS, 5)
         self.time_period_row.set_title("Time Period (s):")
 
+        # Reduction of periods longer than the key is wide
+        downsample_options = Gtk.StringList()
+        downsample_options.append("Min/Max Envelope")
+        downsample_options.append("Largest Triangle (LTTB)")
+        self.downsample_row = Adw.ComboRow(model=downsample_options, title="Long Period Downsampling:")
+
         # Dynamic scaling
         self.dynamic_scaling_row = Adw.SwitchRow(title="Dynamic Y-axis Scaling:")
 
+        # Stacked instead of overlaid fills (graphs with several series only)
+        self.stacked_row = Adw.SwitchRow(title="Stacked Fills:")
+
+        # Incremental scrolling renderer
+        self.scrolling_render_row = Adw.SwitchRow(title="Incremental Scrolling Render:")
+
+        # Backend of full redraws
+        backend_options = Gtk.StringList()
+        backend_options.append("Auto (fastest)")
+        backend_options.append("Matplotlib")
+        backend_options.append("Cairo")
+        self.render_backend_row = Adw.ComboRow(model=backend_options, title="Render Backend:")
+
+        # Plugin-wide debug logging of the pipeline timings
+        self.log_timings_row = Adw.SwitchRow(title="Log Pipeline Timings (all graphs):")
+
+        # Plugin-wide idle time after which renderer processes are shut down
+        self.idle_timeout_row = Adw.SpinRow.new_with_range(0, 3600, 10)
+        self.idle_timeout_row.set_title("Renderer Idle Shutdown (s, 0 = never, all graphs):")
+
+        # Plugin-wide SQLite history
+        self.history_store_row = Adw.SwitchRow(title="Record History to SQLite (all graphs):")
+
         # Load defaults
         settings = self.get_settings()
 
-        self.line1_color_row.color_button.set_rgba(
-            self.prepare_color(settings.get("line1-color", [0, 255, 0, 255]))
-        )
-        self.fill1_color_row.color_button.set_rgba(
-            self.prepare_color(settings.get("fill1-color", [0, 255, 0, 100]))
-        )
-        self.line2_color_row.color_button.set_rgba(
-            self.prepare_color(settings.get("line2-color", [255, 165, 0, 255]))
-        )
-        self.fill2_color_row.color_button.set_rgba(
-            self.prepare_color(settings.get("fill2-color", [255, 165, 0, 100]))
-        )
+        for index, line_row, fill_row in self.color_rows:
+            line_row.color_button.set_rgba(
+                self.prepare_color(settings.get(f"line{index + 1}-color", DEFAULT_LINE_COLORS[index]))
+            )
+            fill_row.color_button.set_rgba(
+                self.prepare_color(settings.get(f"fill{index + 1}-color", DEFAULT_FILL_COLORS[index]))
+            )
 
         self.line_width_row.set_value(settings.get("line-width", 3))
         self.time_period_row.set_value(settings.get("time-period", 15))
+        downsample_mode = settings.get("downsample-mode", DOWNSAMPLE_MODES[0])
+        self.downsample_row.set_selected(DOWNSAMPLE_MODES.index(downsample_mode) if downsample_mode in DOWNSAMPLE_MODES else 0)
         self.dynamic_scaling_row.set_active(settings.get("dynamic-scaling", False))
+        self.stacked_row.set_active(settings.get("stacked", False))
+        self.scrolling_render_row.set_active(settings.get("scrolling-render", False))
+        render_backend = settings.get("render-backend", RENDER_BACKENDS[0])
+        self.render_backend_row.set_selected(RENDER_BACKENDS.index(render_backend) if render_backend in RENDER_BACKENDS else 0)
+        self.log_timings_row.set_active(self.plugin_base.get_settings().get("log-pipeline-timings", False))
+        self.idle_timeout_row.set_value(self.plugin_base.get_settings().get("renderer-idle-timeout", RENDERER_IDLE_TIMEOUT))
+        self.history_store_row.set_active(self.plugin_base.get_settings().get("history-store", False))
 
         # Connect signals
-        self.line1_color_row.color_button.connect("color-set", self.on_line1_color_change)
-        self.fill1_color_row.color_button.connect("color-set", self.on_fill1_color_change)
-        self.line2_color_row.color_button.connect("color-set", self.on_line2_color_change)
-        self.fill2_color_row.color_button.connect("color-set", self.on_fill2_color_change)
+        for index, line_row, fill_row in self.color_rows:
+            line_row.color_button.connect("color-set", self.on_color_change, f"line{index + 1}-color")
+            fill_row.color_button.connect("color-set", self.on_color_change, f"fill{index + 1}-color")
         self.line_width_row.connect("changed", self.on_line_width_change)
         self.time_period_row.connect("changed", self.on_time_period_change)
+        self.downsample_row.connect("notify::selected", self.on_downsample_change)
         self.dynamic_scaling_row.connect("notify::active", self.on_dynamic_scaling_change)
-
-        # Return config rows based on single_line_mode
-        if self.single_line_mode:
-            # Single-line graph: only show line1 color options
-            return [
-                self.line1_color_row, self.fill1_color_row,
-                self.line_width_row, self.time_period_row,
-                self.dynamic_scaling_row
-            ]
-        else:
-            # Dual-line graph: show both line1 and line2 color options
-            return [
-                self.line1_color_row, self.fill1_color_row,
-                self.line2_color_row, self.fill2_color_row,
-                self.line_width_row, self.time_period_row,
-                self.dynamic_scaling_row
-            ]
+        self.stacked_row.connect("notify::active", self.on_stacked_change)
+        self.scrolling_render_row.connect("notify::active", self.on_scrolling_render_change)
+        self.render_backend_row.connect("notify::selected", self.on_render_backend_change)
+        self.log_timings_row.connect("notify::active", self.on_log_timings_change)
+        self.idle_timeout_row.connect("changed", self.on_idle_timeout_change)
+        self.history_store_row.connect("notify::active", self.on_history_store_change)
+
+        rows = []
+        for _, line_row, fill_row in self.color_rows:
+            rows += [line_row, fill_row]
+        rows += [self.line_width_row, self.time_period_row, self.downsample_row, self.dynamic_scaling_row]
+        if len(color_slots) > 1:
+            rows.append(self.stacked_row)
+        rows += [self.scrolling_render_row, self.render_backend_row, self.log_timings_row, self.idle_timeout_row,
+                 self.history_store_row]
+        return rows
 
     def prepare_color(self, color_values: list[int]) -> Gdk.RGBA:
+        color_values = list(color_values)
         if len(color_values) == 3:
             color_values.append(255)
         color = Gdk.RGBA()
         color.parse(f"rgba({color_values[0]}, {color_values[1]}, {color_values[2]}, {color_values[3]})")
         return color
 
-    def on_line1_color_change(self, button):
-        color = self.line1_color_row.color_button.get_rgba()
-        settings = self.get_settings()
-        settings["line1-color"] = [
-            round(color.red * 255),
-            round(color.green * 255),
-            round(color.blue * 255),
-            round(color.alpha * 255)
-        ]
-        self.set_settings(settings)
-        self.show_graph()
-
-    def on_fill1_color_change(self, button):
-        color = self.fill1_color_row.color_button.get_rgba()
-        settings = self.get_settings()
-        settings["fill1-color"] = [
-            round(color.red * 255),
-            round(color.green * 255),
-            round(color.blue * 255),
-            round(color.alpha * 255)
-        ]
-        self.set_settings(settings)
-        self.show_graph()
-
-    def on_line2_color_change(self, button):
-        color = self.line2_color_row.color_button.get_rgba()
+    def on_color_change(self, button, key: str):
+        color = button.get_rgba()
         settings = self.get_settings()
-        settings["line2-color"] = [
+        settings[key] = [
             round(color.red * 255),
             round(color.green * 255),
             round(color.blue * 255),
             round(color.alpha * 255)
         ]
-        self.set_settings(settings)
-        self.show_graph()
-
-    def on_fill2_color_change(self, button):
-        color = self.fill2_color_row.color_button.get_rgba()
-        settings = self.get_settings()
-        settings["fill2-color"] = [
-            round(color.red * 255),
-            round(color.green * 255),
-            round(color.blue * 255),
-            round(color.alpha * 255)
-        ]
-        self.set_settings(settings)
-        self.show_graph()
+        self.save_settings(settings)
 
     def on_line_width_change(self, spin):
         settings = self.get_settings()
         settings["line-width"] = int(spin.get_value())
-        self.set_settings(settings)
-        self.show_graph()
+        self.save_settings(settings)
 
     def on_time_period_change(self, spin):
         settings = self.get_settings()
         settings["time-period"] = int(spin.get_value())
-        self.set_settings(settings)
-        self.set_percentages_length(int(spin.get_value()))
-        self.show_graph()
+        self.save_settings(settings)
+
+    def on_downsample_change(self, combo, *args):
+        settings = self.get_settings()
+        settings["downsample-mode"] = DOWNSAMPLE_MODES[combo.get_selected()]
+        self.save_settings(settings)
 
     def on_dynamic_scaling_change(self, switch, *args):
         settings = self.get_settings()
         settings["dynamic-scaling"] = switch.get_active()
-        self.set_settings(settings)
-        self.show_graph()
+        self.save_settings(settings)
+
+    def on_stacked_change(self, switch, *args):
+        settings = self.get_settings()
+        settings["stacked"] = switch.get_active()
+        self.save_settings(settings)
+
+    def on_scrolling_render_change(self, switch, *args):
+        settings = self.get_settings()
+        settings["scrolling-render"] = switch.get_active()
+        self.save_settings(settings)
+
+    def on_render_backend_change(self, combo, *args):
+        settings = self.get_settings()
+        settings["render-backend"] = RENDER_BACKENDS[combo.get_selected()]
+        self.save_settings(settings)
+
+    def on_log_timings_change(self, switch, *args):
+        # Stored in the plugin settings, it applies to every graph
+        plugin_settings = self.plugin_base.get_settings()
+        plugin_settings["log-pipeline-timings"] = switch.get_active()
+        self.plugin_base.set_settings(plugin_settings)
+        get_pipeline_stats().set_log_enabled(switch.get_active())
+
+    def on_idle_timeout_change(self, spin):
+        # Stored in the plugin settings, it applies to every renderer
+        plugin_settings = self.plugin_base.get_settings()
+        plugin_settings["renderer-idle-timeout"] = int(spin.get_value())
+        self.plugin_base.set_settings(plugin_settings)
+        self.scheduler.set_idle_timeout(int(spin.get_value()))
+
+    def on_history_store_change(self, switch, *args):
+        # Stored in the plugin settings, one store records every GPU
+        plugin_settings = self.plugin_base.get_settings()
+        plugin_settings["history-store"] = switch.get_active()
+        self.plugin_base.set_settings(plugin_settings)
+        self.apply_history_store(switch.get_active())
 
     def on_removed_from_cache(self) -> None:
-        self.task_queue.put((None, None, None, None, None))
+        self.scheduler.unregister(self)
 
 
 class ColorRow(Adw.PreferencesRow):
@@ -254,156 +674,3 @@ class ColorRow(Adw.PreferencesRow):
 
         self.color_button = Gtk.ColorButton(use_alpha=True)
         self.main_box.append(self.color_button)
-
-
-class GraphCreator(Process):
-    def __init__(self, task_queue: Queue, result_queue: Queue):
-        super().__init__(daemon=True, name="GraphCreator")
-        self.task_queue = task_queue
-        self.result_queue = result_queue
-        self.logo_cache = None  # Cache for processed logo
-        self.logo_path_cache = None  # Track logo file path
-
-    def run(self):
-        while True:
-            data = self.task_queue.get()
-            if None in data:
-                break
-            settings, percentages_1, percentages_2, single_line_mode, plugin_dir = data
-            try:
-                result = self.generate_graph(settings, percentages_1, percentages_2, single_line_mode, plugin_dir)
-            except Exception:
-                # Return None on error to avoid deadlocking the result queue
-                result = None
-            self.result_queue.put(result)
-
-    def generate_graph(self, settings: dict, percentages_1: list[float], percentages_2: list[float], 
-                       single_line_mode: bool = False, plugin_dir: str = ""):
-        """Generate a graph with optional dual-line support and NVIDIA logo background"""
-        # Get colors
-        line1_color = self.conv_color_to_plt(settings.get("line1-color", [0, 255, 0, 255]))
-        fill1_color = self.conv_color_to_plt(settings.get("fill1-color", [0, 255, 0, 100]))
-        line2_color = self.conv_color_to_plt(settings.get("line2-color", [255, 165, 0, 255]))
-        fill2_color = self.conv_color_to_plt(settings.get("fill2-color", [255, 165, 0, 100]))
-        
-        line_width = settings.get("line-width", 3)
-        dynamic_scaling = settings.get("dynamic-scaling", False)
-
-        # Create a new figure with a transparent background
-        fig = plt.figure(figsize=(6, 6))
-        fig.patch.set_alpha(0)
-        fig.patch.set_facecolor('none')
-
-        # Set the FigureCanvas to the backend
-        canvas = FigureCanvas(fig)
-
-        # Plot the data with a transparent background
-        ax = plt.Axes(fig, [0., 0., 1., 1.])
-        ax.set_axis_off()
-        ax.patch.set_alpha(0)  # Make axes background transparent
-        ax.patch.set_facecolor('none')
-        fig.add_axes(ax)
-
-        # Plot first line (or only line in single-line mode)
-        if percentages_1:
-            ax.plot(percentages_1, color=line1_color, linewidth=line_width)
-            ax.fill_between(
-                range(len(percentages_1)),
-                percentages_1,
-                color=fill1_color[:3],
-                alpha=fill1_color[3]
-            )
-
-        # Plot second line only if not in single-line mode
-        if percentages_2 and not single_line_mode:
-            ax.plot(percentages_2, color=line2_color, linewidth=line_width)
-            ax.fill_between(
-                range(len(percentages_2)),
-                percentages_2,
-                color=fill2_color[:3],
-                alpha=fill2_color[3]
-            )
-
-        # Hide the spines
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-
-        # Turn off the axis and set margins to zero
-        ax.margins(0)
-        ax.axis('off')
-
-        # Set the y-axis to range from 0 to 100
-        if not dynamic_scaling:
-            ax.set_ylim(0, 100)
-
-        # Draw the canvas and retrieve the buffer
-        canvas.draw()
-        buf = io.BytesIO()
-        canvas.print_png(buf)
-
-        # Convert buffer to a Pillow Image
-        buf.seek(0)
-        graph_img = Image.open(buf).copy()
-        buf.close()
-
-        plt.close()  # Close the plot to free resources
-
-        # Ensure graph is in RGBA mode for compositing
-        if graph_img.mode != "RGBA":
-            graph_img = graph_img.convert("RGBA")
-
-        # Add NVIDIA logo watermark (with caching for performance)
-        try:
-            logo_path = os.path.join(plugin_dir, "nvidia_logo.png")
-            if os.path.exists(logo_path):
-                # Check cache first to avoid reprocessing
-                if self.logo_cache is None or self.logo_path_cache != logo_path:
-                    # Load and process logo once
-                    logo_orig = Image.open(logo_path).convert("RGBA")
-                    
-                    # Resize logo to 100% of graph size
-                    target_size = graph_img.width
-                    logo = logo_orig.resize((target_size, target_size), Image.Resampling.LANCZOS)
-                    
-                    # Adjust opacity and brightness for watermark effect
-                    if logo.mode == 'RGBA':
-                        r, g, b, a = logo.split()
-                        # Brighten the green logo for visibility
-                        brightness = 1.8
-                        r = r.point(lambda x: min(255, int(x * brightness)))
-                        g = g.point(lambda x: min(255, int(x * brightness)))
-                        b = b.point(lambda x: min(255, int(x * brightness)))
-                        # Apply opacity for watermark effect
-                        a = a.point(lambda x: int(x * 0.35))  # 35% opacity
-                        logo = Image.merge('RGBA', (r, g, b, a))
-                    
-                    # Cache the processed logo
-                    self.logo_cache = logo
-                    self.logo_path_cache = logo_path
-                else:
-                    # Use cached logo
-                    logo = self.logo_cache
-                
-                # Build final image: black background + logo + graph on top
-                # 1. Start with solid black background
-                final = Image.new("RGBA", graph_img.size, (0, 0, 0, 255))
-                
-                # 2. Paste logo centered onto black background
-                logo_x = (graph_img.width - logo.width) // 2
-                logo_y = (graph_img.height - logo.height) // 2
-                final.paste(logo, (logo_x, logo_y), logo)
-                
-                # 3. Composite graph on top - graph's opaque areas cover the logo
-                graph_img = Image.alpha_composite(final, graph_img)
-        except Exception:
-            # If logo fails, continue without it
-            pass
-
-        return graph_img
-
-    def conv_color_to_plt(self, color: list[int]) -> list[float]:
-        """Convert RGB(A) 0-255 values to matplotlib 0-1 floats"""
-        float_color: list[float] = []
-        for c in color:
-            float_color.append(c / 255)
-        return float_color
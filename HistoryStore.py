@@ -0,0 +1,209 @@
+"""
+Optional SQLite history of GPU metrics that survives restarts.
+
+The FrameScheduler feeds it one snapshot per GPU and tick. Samples are kept
+in memory and written every FLUSH_INTERVAL seconds in a single transaction,
+by a thread of the store, to a database in WAL mode so queries never wait on
+the writer. Every write also updates rollup tables of per-minute and
+per-hour count, sum, min and max, so a window of a week is answered from a
+few hundred pre-aggregated rows instead of every raw sample.
+
+Only the standard library is used, so the store can also be opened outside
+StreamController (see Export.py).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from loguru import logger as log
+
+# Seconds between two batched writes
+FLUSH_INTERVAL = 5.0
+
+# Bucket sizes of the rollup tables in seconds, smallest first
+ROLLUP_SIZES = (60, 3600)
+
+# Seconds of history kept per table; hourly rollups are kept forever
+RAW_RETENTION = 14 * 24 * 3600
+ROLLUP_RETENTION = {60: 90 * 24 * 3600, 3600: None}
+
+# Seconds between two removals of expired rows
+PRUNE_INTERVAL = 3600.0
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS samples (
+        gpu INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        value REAL NOT NULL,
+        PRIMARY KEY (gpu, metric, ts)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts)",
+] + [
+    f"""CREATE TABLE IF NOT EXISTS rollup_{size} (
+        gpu INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        total REAL NOT NULL,
+        minimum REAL NOT NULL,
+        maximum REAL NOT NULL,
+        PRIMARY KEY (gpu, metric, bucket)
+    ) WITHOUT ROWID"""
+    for size in ROLLUP_SIZES
+]
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open the database in WAL mode with the schema in place"""
+    connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    with connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+    return connection
+
+
+class HistoryStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending: list[tuple[int, str, int, float]] = []  # (gpu, metric, ts, value) not yet written
+        self.writer = connect(path)
+        self.readers = threading.local()  # One connection per querying thread
+        self.last_prune = 0.0
+
+        self.running = True
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="HistoryStore")
+        self.thread.start()
+
+    def record(self, gpu: int, snapshot: dict, timestamp: float = None):
+        """Queue the values of one snapshot; they are written with the next batch"""
+        ts = int(timestamp if timestamp is not None else time.time())
+        with self.lock:
+            self.pending.extend((gpu, metric, ts, float(value)) for metric, value in snapshot.items())
+
+    def run(self):
+        while self.running:
+            self.wakeup.wait(FLUSH_INTERVAL)
+            try:
+                self.flush()
+                if time.monotonic() - self.last_prune > PRUNE_INTERVAL:
+                    self.prune()
+            except sqlite3.Error as e:
+                log.error(f"Failed to write GPU history: {e}")
+
+    def flush(self):
+        """Write the queued samples and update the rollups, in one transaction"""
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return
+
+        rollups = {size: {} for size in ROLLUP_SIZES}
+        with self.writer:
+            for gpu, metric, ts, value in rows:
+                # A second already stored (two ticks within one second) is not counted twice
+                inserted = self.writer.execute(
+                    "INSERT OR IGNORE INTO samples (gpu, metric, ts, value) VALUES (?, ?, ?, ?)",
+                    (gpu, metric, ts, value)
+                ).rowcount
+                if not inserted:
+                    continue
+                for size, buckets in rollups.items():
+                    key = (gpu, metric, ts - ts % size)
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        buckets[key] = [1, value, value, value]
+                    else:
+                        bucket[0] += 1
+                        bucket[1] += value
+                        bucket[2] = min(bucket[2], value)
+                        bucket[3] = max(bucket[3], value)
+
+            for size, buckets in rollups.items():
+                self.writer.executemany(
+                    f"""INSERT INTO rollup_{size} (gpu, metric, bucket, count, total, minimum, maximum)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (gpu, metric, bucket) DO UPDATE SET
+                            count = count + excluded.count,
+                            total = total + excluded.total,
+                            minimum = min(minimum, excluded.minimum),
+                            maximum = max(maximum, excluded.maximum)""",
+                    [(*key, *bucket) for key, bucket in buckets.items()]
+                )
+
+    def prune(self):
+        """Delete rows older than the retention of their table"""
+        self.last_prune = time.monotonic()
+        now = int(time.time())
+        with self.writer:
+            self.writer.execute("DELETE FROM samples WHERE ts < ?", (now - RAW_RETENTION,))
+            for size, retention in ROLLUP_RETENTION.items():
+                if retention is not None:
+                    self.writer.execute(f"DELETE FROM rollup_{size} WHERE bucket < ?", (now - retention,))
+
+    def get_reader(self) -> sqlite3.Connection:
+        connection = getattr(self.readers, "connection", None)
+        if connection is None:
+            connection = connect(self.path)
+            self.readers.connection = connection
+        return connection
+
+    def query(self, gpu: int, metric: str, start: float, end: float, bucket: int = 1) -> list[tuple]:
+        """
+        (bucket start, count, mean, min, max) per bucket of `bucket` seconds
+        in [start, end), oldest first. Read from the largest rollup the
+        bucket is a multiple of, or from the raw samples. Samples of the
+        batch not written yet are not included.
+        """
+        bucket = max(1, int(bucket))
+        rollup = max((size for size in ROLLUP_SIZES if bucket % size == 0), default=None)
+        if rollup is None:
+            sql = """SELECT ts / :bucket * :bucket AS start, COUNT(*), AVG(value), MIN(value), MAX(value)
+                     FROM samples WHERE gpu = :gpu AND metric = :metric AND ts >= :start AND ts < :end
+                     GROUP BY start ORDER BY start"""
+        else:
+            sql = f"""SELECT bucket / :bucket * :bucket AS start, SUM(count), SUM(total) / SUM(count),
+                             MIN(minimum), MAX(maximum)
+                      FROM rollup_{rollup} WHERE gpu = :gpu AND metric = :metric
+                          AND bucket >= :start AND bucket < :end
+                      GROUP BY start ORDER BY start"""
+        return self.get_reader().execute(sql, {
+            "bucket": bucket, "gpu": gpu, "metric": metric, "start": int(start), "end": int(end),
+        }).fetchall()
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        if not self.running:
+            return
+        self.running = False
+        self.wakeup.set()
+        self.thread.join()
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            log.error(f"Failed to write GPU history: {e}")
+        self.writer.close()
+
+
+# Singleton instance
+_history_store_instance = None
+
+def get_history_store(path: str) -> HistoryStore:
+    """Get or open the singleton history store"""
+    global _history_store_instance
+    if _history_store_instance is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _history_store_instance = HistoryStore(path)
+    return _history_store_instance
+
+def close_history_store():
+    global _history_store_instance
+    if _history_store_instance is not None:
+        _history_store_instance.close()
+        _history_store_instance = None
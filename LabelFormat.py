@@ -0,0 +1,74 @@
+"""
+Label format templates such as "{gpu:.0f}% {temp}°C".
+
+A template is parsed and compiled once, when the settings change, into a
+positional format string plus the list of fields it references. Formatting
+a label per tick is then one lookup per referenced field and one
+str.format call.
+"""
+
+import string
+
+from loguru import logger as log
+
+from plugins.com_streamcontroller_NVIDIAPlugin.MetricRegistry import METRICS
+
+# Template field -> (snapshot metric, conversion of the metric's value or None)
+TEMPLATE_FIELDS = {descriptor.field: (metric, None) for metric, descriptor in METRICS.items()}
+# MB metrics can also be shown in GB
+TEMPLATE_FIELDS.update({
+    f"{descriptor.field}_gb": (metric, lambda mb: mb / 1024)
+    for metric, descriptor in METRICS.items() if descriptor.unit == "MB"
+})
+
+
+class LabelTemplate:
+    """A compiled label template"""
+
+    def __init__(self, template: str):
+        self.template = template
+        self.fields = []  # (snapshot metric, conversion) per positional field
+        try:
+            self.compiled = self.compile(template)
+        except ValueError as e:
+            # Shown as typed, so the mistake is visible on the key
+            log.warning(f"Invalid label format {template!r}: {e}")
+            self.compiled = template.replace("{", "{{").replace("}", "}}")
+            self.fields = []
+        self.metrics = frozenset(metric for metric, _ in self.fields)
+
+    def compile(self, template: str) -> str:
+        """Positional format string of the template, fills self.fields"""
+        parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if field not in TEMPLATE_FIELDS:
+                raise ValueError(f"unknown field {field!r}")
+            if "{" in spec:
+                raise ValueError("nested fields are not supported")
+            parts.append("{" + str(len(self.fields))
+                         + (f"!{conversion}" if conversion else "")
+                         + (f":{spec}" if spec else "") + "}")
+            self.fields.append(TEMPLATE_FIELDS[field])
+        return "".join(parts)
+
+    def format(self, snapshot: dict) -> str:
+        values = []
+        for metric, convert in self.fields:
+            value = snapshot[metric]
+            values.append(value if convert is None else convert(value))
+        try:
+            return self.compiled.format(*values)
+        except (ValueError, TypeError):
+            # Format spec that does not fit the value, e.g. "{gpu:d}"
+            return self.template
+
+
+def get_label_template(metric: str, label_format: str = "") -> LabelTemplate:
+    """Template of a label: its custom format if set, otherwise its metric's"""
+    if label_format:
+        return LabelTemplate(label_format)
+    descriptor = METRICS.get(metric)
+    return LabelTemplate(descriptor.template if descriptor is not None else "")
@@ -0,0 +1,60 @@
+"""
+Registry of every metric the plugin can show.
+
+One descriptor per metric drives the monitor (which NVML source to read and
+how often), the label templates, the metric dropdowns and the graph series.
+Adding a metric means adding a descriptor here and, for a new NVML source,
+a read_<source> method to NVIDIAMonitor.
+"""
+
+from dataclasses import dataclass
+
+# Seconds between two NVML reads of a metric, by cost class, unless the
+# metric sets its own cadence. Cheap queries are read every sample;
+# expensive ones are reused for a while
+COST_CADENCES = {
+    "cheap": 1.0,
+    "expensive": 2.0,
+}
+
+
+@dataclass(frozen=True)
+class MetricDescriptor:
+    id: str  # Key used in settings, e.g. "gpu-usage"
+    label: str  # Name shown in dropdowns
+    unit: str
+    source: str  # NVML source, read by NVIDIAMonitor.read_<source>
+    cost: str  # Key of COST_CADENCES
+    field: str  # Name of the metric in label templates
+    template: str  # Label format when the metric is picked without a custom format
+    scale: float = None  # Graph full scale, None if provided by the monitor or not graphable
+    graphable: bool = True  # Whether graphs can show the metric
+    cadence: float = None  # Seconds between reads, None for the cost class default
+    default: float = 0.0  # Value while the source cannot be read
+
+    def get_cadence(self) -> float:
+        return self.cadence if self.cadence is not None else COST_CADENCES[self.cost]
+
+    def get_option_label(self) -> str:
+        """Dropdown entry, e.g. "GPU Usage (%)" """
+        return f"{self.label} ({self.unit})"
+
+
+METRICS = {descriptor.id: descriptor for descriptor in (
+    MetricDescriptor("gpu-usage", "GPU Usage", "%", "utilization", "cheap", "gpu", "{gpu:.0f}%", scale=100),
+    MetricDescriptor("vram-usage", "VRAM Usage", "%", "memory", "cheap", "vram", "{vram:.0f}%", scale=100),
+    MetricDescriptor("vram-used", "VRAM Used", "MB", "memory", "cheap", "vram_used", "{vram_used:.0f} MB",
+                     graphable=False, default=0),
+    # The total never changes, it shares the memory query anyway
+    MetricDescriptor("vram-total", "Total VRAM", "MB", "memory", "cheap", "vram_total", "{vram_total:.0f} MB",
+                     graphable=False, cadence=60.0, default=0),
+    MetricDescriptor("temperature", "Temperature", "°C", "temperature", "cheap", "temp", "{temp:.0f}°C",
+                     scale=100, default=0),
+    # Power graphs are scaled to the board power limit
+    MetricDescriptor("power", "Power Draw", "W", "power", "cheap", "power", "{power:.0f} W"),
+    MetricDescriptor("encoder-usage", "Encoder Usage", "%", "encoder", "expensive", "encoder", "{encoder:.0f}%",
+                     scale=100),
+)}
+
+# Metrics a graph series can show
+GRAPHABLE_METRICS = [metric for metric, descriptor in METRICS.items() if descriptor.graphable]
@@ -4,28 +4,17 @@ Displays GPU usage and VRAM usage as two lines on the same graph.
 """
 
 from plugins.com_streamcontroller_NVIDIAPlugin.GraphBase import GraphBase
-from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
 
 
 class NVIDIACombinedGraph(GraphBase):
     ACTION_NAME = "NVIDIA GPU + VRAM Graph"
     CONTROLS_KEY_IMAGE = True
+    SERIES = ("gpu-usage", "vram-usage")
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.has_configuration = True
-        self.monitor = get_nvidia_monitor()
 
     def on_ready(self):
-        self.show_graph()
+        self.show_graph(force=True)
 
-    def on_tick(self):
-        # Append new data points
-        # Line 1: GPU usage
-        self.percentages_1.append(self.monitor.get_gpu_utilization())
-        
-        # Line 2: VRAM usage
-        self.percentages_2.append(self.monitor.get_vram_usage_percent())
-        
-        # Update the graph
-        self.show_graph()
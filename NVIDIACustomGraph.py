@@ -0,0 +1,71 @@
+"""
+NVIDIA Custom Graph Action.
+Displays up to five user-selected metrics (GPU, VRAM, temperature, power,
+encoder) on one graph, overlaid or stacked.
+"""
+
+from plugins.com_streamcontroller_NVIDIAPlugin.GraphBase import GraphBase
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import GRAPH_METRICS, MAX_SERIES
+
+# Import gtk
+import gi
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Gtk, Adw
+
+# Metrics shown until the user picks their own
+DEFAULT_SERIES_METRICS = ["gpu-usage", "vram-usage", "temperature"]
+
+# Dropdown entries: "none" first, then every graph metric
+METRIC_OPTIONS = ["none"] + list(GRAPH_METRICS)
+
+
+class NVIDIACustomGraph(GraphBase):
+    ACTION_NAME = "NVIDIA Custom Graph"
+    CONTROLS_KEY_IMAGE = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.has_configuration = True
+
+    def on_ready(self):
+        self.show_graph(force=True)
+
+    def get_series_metrics(self, settings: dict) -> list[str]:
+        metrics = []
+        for metric in settings.get("series-metrics", DEFAULT_SERIES_METRICS):
+            # Every metric at most once
+            if metric in GRAPH_METRICS and metric not in metrics:
+                metrics.append(metric)
+        return metrics[:MAX_SERIES] or DEFAULT_SERIES_METRICS[:1]
+
+    def get_color_slots(self) -> list[tuple[int, str]]:
+        return [
+            (index, f"Series {index + 1}")
+            for index in range(len(self.get_series_metrics(self.get_settings())))
+        ]
+
+    def get_config_rows(self) -> list:
+        metric_options = Gtk.StringList()
+        for metric in METRIC_OPTIONS:
+            metric_options.append("None" if metric == "none" else GRAPH_METRICS[metric][0])
+
+        selected = self.get_series_metrics(self.get_settings())
+        self.series_rows = []
+        for index in range(MAX_SERIES):
+            row = Adw.ComboRow(model=metric_options, title=f"Series {index + 1} Metric")
+            metric = selected[index] if index < len(selected) else "none"
+            row.set_selected(METRIC_OPTIONS.index(metric))
+            row.connect("notify::selected", self.on_series_metric_change)
+            self.series_rows.append(row)
+
+        return self.series_rows + super().get_config_rows()
+
+    def on_series_metric_change(self, *args):
+        settings = self.get_settings()
+        settings["series-metrics"] = [
+            METRIC_OPTIONS[row.get_selected()]
+            for row in self.series_rows
+            if row.get_selected() > 0
+        ]
+        self.save_settings(settings)
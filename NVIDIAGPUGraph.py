@@ -4,25 +4,17 @@ Displays GPU usage as a single-line graph with NVIDIA logo background.
 """
 
 from plugins.com_streamcontroller_NVIDIAPlugin.GraphBase import GraphBase
-from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
 
 
 class NVIDIAGPUGraph(GraphBase):
     ACTION_NAME = "NVIDIA GPU Usage Graph"
     CONTROLS_KEY_IMAGE = True
+    SERIES = ("gpu-usage",)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.has_configuration = True
-        self.monitor = get_nvidia_monitor()
-        self.single_line_mode = True  # Only one line
 
     def on_ready(self):
-        self.show_graph()
+        self.show_graph(force=True)
 
-    def on_tick(self):
-        # Append new data point for GPU usage only
-        self.percentages_1.append(self.monitor.get_gpu_utilization())
-        
-        # Update the graph
-        self.show_graph()
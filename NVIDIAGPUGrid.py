@@ -0,0 +1,229 @@
+"""
+NVIDIA Multi-GPU Grid Action.
+Displays one metric of every GPU in the system as a grid of mini sparklines
+(or bars) on a single key.
+
+All tiles are drawn in one pass into one image over the shared logo
+background and applied with a single set_media. A tile is only redrawn when
+its own data changed; the others keep their pixels from the last frame.
+"""
+
+import dataclasses
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from plugins.com_streamcontroller_NVIDIAPlugin.GraphBase import GraphBase, FINGERPRINT_RESOLUTION, load_font
+from plugins.com_streamcontroller_NVIDIAPlugin.Renderer import ScrollingGraph, MAX_DATA_POINTS
+from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import GraphConfig, GRAPH_METRICS, GRID_STYLES
+from plugins.com_streamcontroller_NVIDIAPlugin.RingBuffer import RingBuffer
+
+# Import gtk
+import gi
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Gtk, Adw
+
+# Size of the grid image in pixels (square)
+GRID_SIZE = 300
+
+# Gap between tiles and around the grid in pixels
+TILE_GAP = 6
+
+
+class NVIDIAGPUGrid(GraphBase):
+    ACTION_NAME = "NVIDIA Multi-GPU Grid"
+    CONTROLS_KEY_IMAGE = True
+    SERIES = ("gpu-usage",)
+    RENDERS_IN_PROCESS = True
+
+    def __init__(self, *args, **kwargs):
+        self.monitors = [get_nvidia_monitor(index) for index in range(max(1, get_nvidia_monitor().get_device_count()))]
+        self.tile_history: dict[tuple[int, str], RingBuffer] = {}  # (GPU index, metric) -> samples
+        self.retained: set[str] = set()
+        super().__init__(*args, **kwargs)
+        self.has_configuration = True
+
+        # Grid image and per tile state, rebuilt when the settings change
+        self.canvas = None
+        self.canvas_version = None
+        self.tiles = []
+        self.font = load_font(GRID_SIZE // 12)
+
+    def on_ready(self):
+        self.show_graph(force=True)
+
+    def get_series_metrics(self, settings: dict) -> list[str]:
+        metric = settings.get("grid-metric", self.SERIES[0])
+        return [metric if metric in GRAPH_METRICS else self.SERIES[0]]
+
+    def retain_history(self, retained: set[str]):
+        for key in list(self.tile_history):
+            if key[1] not in retained:
+                del self.tile_history[key]
+        self.retained = retained
+
+        # Like GraphBase, every GPU's new buffers match the others or start from the store
+        keys = [(index, metric) for index in range(len(self.monitors)) for metric in retained]
+        added = [key for key in keys if key not in self.tile_history]
+        if not added:
+            return
+        length = max((len(buffer) for buffer in self.tile_history.values()), default=0)
+        if length:
+            self.backfill_history({key: self.get_tile_history(*key) for key in added}, length)
+        else:
+            self.backfill_history({key: self.get_tile_history(*key) for key in keys})
+
+    def collect_sample(self):
+        config = self.get_render_config()  # Makes sure the retained metrics are known
+        for index, monitor in enumerate(self.monitors):
+            snapshot = monitor.get_snapshot(self.retained)
+            for metric in self.retained:
+                self.get_tile_history(index, metric).append(float(snapshot[metric]))
+        self.update_downsampler(config)
+
+    def get_sampled_metrics(self) -> set[tuple[int, str]]:
+        self.get_render_config()
+        return {(index, metric) for index in range(len(self.monitors)) for metric in self.retained}
+
+    def get_series(self) -> list[RingBuffer]:
+        """One buffer per GPU, so the frame fingerprint covers every tile"""
+        metric = self.get_render_config().series[0].metric
+        return [self.get_tile_history(index, metric) for index in range(len(self.monitors))]
+
+    def get_tile_history(self, index: int, metric: str) -> RingBuffer:
+        buffer = self.tile_history.get((index, metric))
+        if buffer is None:
+            buffer = RingBuffer(MAX_DATA_POINTS)
+            self.tile_history[(index, metric)] = buffer
+        return buffer
+
+    def render_layers(self, config: GraphConfig) -> list[Image.Image]:
+        return [self.render_grid(config)]
+
+    def build_tiles(self, config: GraphConfig):
+        """Lay out the tiles and start over from the plain background"""
+        count = len(self.monitors)
+        columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        width = (GRID_SIZE - TILE_GAP) // columns - TILE_GAP
+        height = (GRID_SIZE - TILE_GAP) // rows - TILE_GAP
+
+        self.background = self.get_logo_background((GRID_SIZE, GRID_SIZE))
+        self.canvas = self.background.copy()
+        self.canvas_version = config.version
+
+        style = config.series[0]
+        self.tiles = []
+        for index, monitor in enumerate(self.monitors):
+            box = (
+                TILE_GAP + (index % columns) * (width + TILE_GAP),
+                TILE_GAP + (index // columns) * (height + TILE_GAP),
+            )
+            # Power is scaled to the limit of each board
+            scale = (monitor.get_power_limit_watts() or 100) if style.metric == "power" else style.scale
+            tile_config = dataclasses.replace(config, series=(dataclasses.replace(style, scale=scale),))
+            self.tiles.append(GridTile(index, box, width, height, tile_config, self.get_tile_history(index, style.metric)))
+
+    def render_grid(self, config: GraphConfig) -> Image:
+        if self.canvas is None or self.canvas_version != config.version:
+            self.build_tiles(config)
+
+        # One downsampled series per GPU, in tile order
+        windows = self.get_downsampled_windows(config, self.tiles[0].width)
+        for tile, window in zip(self.tiles, windows):
+            fingerprint = tile.get_fingerprint(config.grid_style, window)
+            if fingerprint == tile.fingerprint:
+                # Data of this GPU did not visibly change
+                continue
+            tile.fingerprint = fingerprint
+
+            # Restore the background under the tile, then draw the tile over it
+            x, y = tile.box
+            self.canvas.paste(self.background.crop((x, y, x + tile.width, y + tile.height)), tile.box)
+            if config.grid_style == "bar":
+                graph = tile.render_bar()
+            else:
+                graph = tile.render_sparkline(window)
+            self.canvas.alpha_composite(graph, dest=tile.box)
+            self.draw_tile_label(tile)
+
+        return self.canvas.copy()
+
+    def draw_tile_label(self, tile: "GridTile"):
+        """GPU index and newest value in the tile's top left corner"""
+        style = tile.config.series[0]
+        text = f"{tile.index}: {tile.history.latest():.0f}{style.unit}"
+        ImageDraw.Draw(self.canvas).text(
+            (tile.box[0] + 3, tile.box[1] + 2), text, fill=(255, 255, 255, 255), font=self.font,
+            stroke_width=1, stroke_fill=(0, 0, 0, 255)
+        )
+
+    def get_config_rows(self) -> list:
+        metric_options = Gtk.StringList()
+        for metric in GRAPH_METRICS:
+            metric_options.append(GRAPH_METRICS[metric][0])
+        self.grid_metric_row = Adw.ComboRow(model=metric_options, title="Metric")
+
+        style_options = Gtk.StringList()
+        style_options.append("Sparklines")
+        style_options.append("Bars")
+        self.grid_style_row = Adw.ComboRow(model=style_options, title="Tile Style")
+
+        settings = self.get_settings()
+        self.grid_metric_row.set_selected(list(GRAPH_METRICS).index(self.get_series_metrics(settings)[0]))
+        grid_style = settings.get("grid-style", GRID_STYLES[0])
+        self.grid_style_row.set_selected(GRID_STYLES.index(grid_style) if grid_style in GRID_STYLES else 0)
+
+        self.grid_metric_row.connect("notify::selected", self.on_grid_metric_change)
+        self.grid_style_row.connect("notify::selected", self.on_grid_style_change)
+
+        return [self.grid_metric_row, self.grid_style_row] + super().get_config_rows()
+
+    def on_grid_metric_change(self, combo, *args):
+        settings = self.get_settings()
+        settings["grid-metric"] = list(GRAPH_METRICS)[combo.get_selected()]
+        self.save_settings(settings)
+
+    def on_grid_style_change(self, combo, *args):
+        settings = self.get_settings()
+        settings["grid-style"] = GRID_STYLES[combo.get_selected()]
+        self.save_settings(settings)
+
+
+class GridTile:
+    """One GPU's cell of the grid"""
+
+    def __init__(self, index: int, box: tuple[int, int], width: int, height: int, config: GraphConfig,
+                 history: RingBuffer):
+        self.index = index
+        self.box = box
+        self.width = width
+        self.height = height
+        self.config = config
+        self.history = history
+        self.fingerprint = None  # Fingerprint of the data currently drawn
+        self.graph = ScrollingGraph(width, height)
+
+    def get_fingerprint(self, grid_style: str, window: np.ndarray) -> int:
+        scale = 1 / FINGERPRINT_RESOLUTION
+        latest = round(self.history.latest() * scale)  # Also shown in the label
+        if grid_style == "bar":
+            return hash((grid_style, latest))
+        return hash((grid_style, latest, np.rint(window * scale).astype(np.int16).tobytes()))
+
+    def render_sparkline(self, window: np.ndarray) -> Image:
+        return self.graph.render(self.config, [window])
+
+    def render_bar(self) -> Image:
+        """Bar of the newest value with the line color on its top edge"""
+        style = self.config.series[0]
+        level = min(1.0, max(0.0, self.history.latest() / style.scale))
+        top = min(self.height - 1, round(self.height * (1 - level)))
+        image = Image.new("RGBA", (self.width, self.height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, top, self.width - 1, self.height - 1), fill=style.fill_rgba)
+        draw.line((0, top, self.width - 1, top), fill=style.line_rgba, width=max(1, self.height // 30))
+        return image
@@ -0,0 +1,169 @@
+"""
+NVIDIA Hybrid Graph Action.
+Displays the current value of one metric in large digits over a faint
+sparkline of its recent history, on a single key.
+
+The frame is composited from two cached layers, both read from the action's
+history: the sparkline is the incremental ScrollingGraph, so a new sample
+only scrolls it and draws the newest segment, and the digits are pasted from
+a glyph cache, so they are only rebuilt when the shown text changes.
+"""
+
+import dataclasses
+import math
+
+from PIL import Image, ImageDraw
+
+from plugins.com_streamcontroller_NVIDIAPlugin.GraphBase import GraphBase, load_font
+from plugins.com_streamcontroller_NVIDIAPlugin.Renderer import ScrollingGraph
+from plugins.com_streamcontroller_NVIDIAPlugin.LabelFormat import get_label_template
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import GraphConfig, GRAPH_METRICS
+
+# Import gtk
+import gi
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Gtk, Adw
+
+# Size of the key image in pixels (square), twice the 72 px of a standard key
+HYBRID_SIZE = 144
+
+# Time period until the user picks their own: the last minute
+HYBRID_TIME_PERIOD = 60
+
+# Opacity of the sparkline under the digits
+SPARKLINE_OPACITY = 0.45
+
+# Height of the digits relative to the key, shrunk if the text is too wide
+DIGIT_SIZE = 0.4
+
+# Free space left and right of the digits in pixels
+DIGIT_MARGIN = 6
+
+
+class NVIDIAHybridGraph(GraphBase):
+    ACTION_NAME = "NVIDIA Hybrid Graph"
+    CONTROLS_KEY_IMAGE = True
+    SERIES = ("gpu-usage",)
+    RENDERS_IN_PROCESS = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.has_configuration = True
+
+        self.sparkline = ScrollingGraph(HYBRID_SIZE, HYBRID_SIZE)
+        self.glyphs = GlyphCache()
+        self.background = None
+
+        # Derived from the config, rebuilt when its version changes
+        self.layer_version = None
+        self.faint_config = None
+        self.template = None
+
+        # Digits layer and the text it shows
+        self.number_text = None
+        self.number_layer = None
+
+    def on_ready(self):
+        settings = self.get_settings()
+        if "time-period" not in settings:
+            settings["time-period"] = HYBRID_TIME_PERIOD
+            self.set_settings(settings)
+            self.invalidate_render_config()
+        self.show_graph(force=True)
+
+    def get_series_metrics(self, settings: dict) -> list[str]:
+        metric = settings.get("hybrid-metric", self.SERIES[0])
+        return [metric if metric in GRAPH_METRICS else self.SERIES[0]]
+
+    def update_layers(self, config: GraphConfig):
+        """Rebuild what the layers derive from the config, after a settings or view change"""
+        self.layer_version = config.version
+
+        # Same colors as the graphs, faded
+        style = config.series[0]
+        fade = lambda rgba: (*rgba[:3], round(rgba[3] * SPARKLINE_OPACITY))
+        faint_style = dataclasses.replace(style, line_rgba=fade(style.line_rgba), fill_rgba=fade(style.fill_rgba))
+        self.faint_config = dataclasses.replace(config, series=(faint_style,))
+
+        # Digits are formatted like the metric's label
+        self.template = get_label_template(style.metric)
+        self.number_text = None
+
+    def render_layers(self, config: GraphConfig) -> list[Image.Image]:
+        if self.layer_version != config.version:
+            self.update_layers(config)
+
+        # At least two pixels per point (envelope buckets have two points)
+        window = self.get_downsampled_windows(config, HYBRID_SIZE // 2)[0]
+        sparkline = self.sparkline.render(self.faint_config, [window])
+
+        metric = config.series[0].metric
+        text = self.template.format({metric: self.get_history(metric).latest()})
+        if text != self.number_text:
+            self.number_text = text
+            self.number_layer = self.glyphs.render(text, HYBRID_SIZE, HYBRID_SIZE)
+
+        if self.background is None:
+            self.background = self.get_logo_background((HYBRID_SIZE, HYBRID_SIZE))
+        return [self.background, sparkline, self.number_layer]
+
+    def get_config_rows(self) -> list:
+        metric_options = Gtk.StringList()
+        for metric in GRAPH_METRICS:
+            metric_options.append(GRAPH_METRICS[metric][0])
+        self.hybrid_metric_row = Adw.ComboRow(model=metric_options, title="Metric")
+        self.hybrid_metric_row.set_selected(list(GRAPH_METRICS).index(self.get_series_metrics(self.get_settings())[0]))
+        self.hybrid_metric_row.connect("notify::selected", self.on_hybrid_metric_change)
+        return [self.hybrid_metric_row] + super().get_config_rows()
+
+    def on_hybrid_metric_change(self, combo, *args):
+        settings = self.get_settings()
+        settings["hybrid-metric"] = list(GRAPH_METRICS)[combo.get_selected()]
+        self.save_settings(settings)
+
+
+class GlyphCache:
+    """White digits with a black outline, each character drawn once per size"""
+
+    def __init__(self):
+        self.glyphs: dict[tuple[int, str], tuple[Image.Image, float]] = {}  # (size, char) -> (image, advance)
+
+    def get_glyph(self, size: int, char: str) -> tuple[Image.Image, float]:
+        glyph = self.glyphs.get((size, char))
+        if glyph is None:
+            font = load_font(size)
+            stroke = max(1, size // 16)
+            advance = font.getlength(char)
+            ascent, descent = font.getmetrics()
+            image = Image.new("RGBA", (math.ceil(advance) + 2 * stroke, ascent + descent + 2 * stroke), (0, 0, 0, 0))
+            ImageDraw.Draw(image).text((stroke, stroke), char, fill=(255, 255, 255, 255), font=font,
+                                       stroke_width=stroke, stroke_fill=(0, 0, 0, 255))
+            glyph = (image, advance)
+            self.glyphs[(size, char)] = glyph
+        return glyph
+
+    def get_width(self, size: int, text: str) -> float:
+        return sum(self.get_glyph(size, char)[1] for char in text)
+
+    def render(self, text: str, width: int, height: int) -> Image:
+        """Transparent width x height layer with the text centered"""
+        layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        if not text:
+            return layer
+
+        size = round(height * DIGIT_SIZE)
+        text_width = self.get_width(size, text)
+        if text_width > width - 2 * DIGIT_MARGIN:
+            size = max(8, int(size * (width - 2 * DIGIT_MARGIN) / text_width))
+            text_width = self.get_width(size, text)
+
+        x = (width - text_width) / 2
+        glyph_height = self.get_glyph(size, text[0])[0].height
+        y = (height - glyph_height) // 2
+        for char in text:
+            image, advance = self.get_glyph(size, char)
+            stroke = (image.width - math.ceil(advance)) // 2
+            layer.alpha_composite(image, dest=(max(0, round(x) - stroke), max(0, y)))
+            x += advance
+        return layer
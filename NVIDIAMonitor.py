@@ -1,19 +1,35 @@
 """
 Singleton monitor for NVIDIA GPU metrics using pynvml
+
+Metrics are read per NVML source (see MetricRegistry): one query returns
+every metric of its source, and a reading is reused until the metric's
+cadence is due, so any number of keys showing a metric share one query.
 """
 
 import os
 import ctypes
+import threading
+import time
 from loguru import logger as log
 
+from plugins.com_streamcontroller_NVIDIAPlugin.MetricRegistry import METRICS
+from plugins.com_streamcontroller_NVIDIAPlugin.PipelineStats import timed
+
+# A reading younger than a metric's cadence minus this many seconds is
+# current, so reads that are one tick apart do not just miss it
+CADENCE_SLACK = 0.25
+
 
 class NVIDIAMonitor:
-    """Singleton monitor for NVIDIA GPU metrics"""
+    """Singleton monitor for NVIDIA GPU metrics of one GPU"""
     
-    def __init__(self):
+    def __init__(self, index: int = 0):
+        self.index = index
         self.initialized = False
         self.handle = None
         self.pynvml = None
+        self.lock = threading.Lock()
+        self.readings: dict[str, tuple[float, dict]] = {}  # Source -> (read at, metric values)
         
         try:
             # Load NVIDIA library from plugin directory for Flatpak compatibility
@@ -29,68 +45,129 @@ class NVIDIAMonitor:
                 self.pynvml.nvmlLib = ctypes.CDLL(lib_path)
             
             self.pynvml.nvmlInit()
-            # Get first GPU (index 0)
-            self.handle = self.pynvml.nvmlDeviceGetHandleByIndex(0)
+            self.handle = self.pynvml.nvmlDeviceGetHandleByIndex(index)
             self.initialized = True
-            log.info("NVIDIA GPU monitoring initialized successfully")
+            log.info(f"NVIDIA GPU {index} monitoring initialized successfully")
         except Exception as e:
             log.error(f"Failed to initialize NVIDIA GPU monitoring: {e}")
             self.initialized = False
     
-    def get_gpu_utilization(self) -> float:
-        """Get current GPU usage percentage (0-100)"""
+    def get_device_count(self) -> int:
+        """Get the number of NVIDIA GPUs in the system"""
         if not self.initialized:
-            return 0.0
+            return 0
         try:
-            utilization = self.pynvml.nvmlDeviceGetUtilizationRates(self.handle)
-            return float(utilization.gpu)
+            return int(self.pynvml.nvmlDeviceGetCount())
         except Exception as e:
-            log.error(f"Failed to get GPU utilization: {e}")
-            return 0.0
+            log.error(f"Failed to get GPU count: {e}")
+            return 0
     
-    def get_vram_usage_percent(self) -> float:
-        """Get current VRAM usage percentage (0-100)"""
+    def refresh(self, metrics):
+        """Read every NVML source of the given metrics whose cadence is due"""
+        now = time.monotonic()
+        due = {}
+        for metric in metrics:
+            descriptor = METRICS.get(metric)
+            if descriptor is None:
+                continue
+            cadence = descriptor.get_cadence() - CADENCE_SLACK
+            due[descriptor.source] = min(due.get(descriptor.source, cadence), cadence)
+
+        for source, cadence in due.items():
+            with self.lock:
+                reading = self.readings.get(source)
+                if reading is not None and now - reading[0] < cadence:
+                    continue
+                self.readings[source] = (now, self.read_source(source))
+
+    def get_snapshot(self, metrics) -> dict:
+        """Current value of every given metric, reading only the sources that are due"""
+        metrics = list(metrics)
+        self.refresh(metrics)
+        snapshot = {}
+        for metric in metrics:
+            descriptor = METRICS.get(metric)
+            reading = self.readings.get(descriptor.source) if descriptor is not None else None
+            values = reading[1] if reading is not None else {}
+            snapshot[metric] = values.get(metric, descriptor.default if descriptor is not None else 0)
+        return snapshot
+
+    def get_value(self, metric: str):
+        return self.get_snapshot((metric,))[metric]
+
+    @timed("sample")
+    def read_source(self, source: str) -> dict:
+        """Query one NVML source, the values of all of its metrics (empty on failure)"""
         if not self.initialized:
-            return 0.0
+            return {}
         try:
-            mem_info = self.pynvml.nvmlDeviceGetMemoryInfo(self.handle)
-            return (mem_info.used / mem_info.total) * 100
+            return getattr(self, f"read_{source}")()
         except Exception as e:
-            log.error(f"Failed to get VRAM usage: {e}")
-            return 0.0
-    
+            log.error(f"Failed to read GPU {source}: {e}")
+            return {}
+
+    def read_utilization(self) -> dict:
+        utilization = self.pynvml.nvmlDeviceGetUtilizationRates(self.handle)
+        return {"gpu-usage": float(utilization.gpu)}
+
+    def read_memory(self) -> dict:
+        mem_info = self.pynvml.nvmlDeviceGetMemoryInfo(self.handle)
+        return {
+            "vram-usage": (mem_info.used / mem_info.total) * 100,
+            "vram-used": int(mem_info.used / (1024 * 1024)),
+            "vram-total": int(mem_info.total / (1024 * 1024)),
+        }
+
+    def read_temperature(self) -> dict:
+        temp = self.pynvml.nvmlDeviceGetTemperature(self.handle, self.pynvml.NVML_TEMPERATURE_GPU)
+        return {"temperature": int(temp)}
+
+    def read_power(self) -> dict:
+        # NVML reports milliwatts
+        return {"power": self.pynvml.nvmlDeviceGetPowerUsage(self.handle) / 1000}
+
+    def read_encoder(self) -> dict:
+        # Returns [utilization, sampling period in us]
+        utilization, _ = self.pynvml.nvmlDeviceGetEncoderUtilization(self.handle)
+        return {"encoder-usage": float(utilization)}
+
+    def get_gpu_utilization(self) -> float:
+        """Get current GPU usage percentage (0-100)"""
+        return self.get_value("gpu-usage")
+
+    def get_vram_usage_percent(self) -> float:
+        """Get current VRAM usage percentage (0-100)"""
+        return self.get_value("vram-usage")
+
     def get_vram_used_mb(self) -> int:
         """Get current VRAM used in MB"""
-        if not self.initialized:
-            return 0
-        try:
-            mem_info = self.pynvml.nvmlDeviceGetMemoryInfo(self.handle)
-            return int(mem_info.used / (1024 * 1024))
-        except Exception as e:
-            log.error(f"Failed to get VRAM used: {e}")
-            return 0
-    
+        return self.get_value("vram-used")
+
     def get_vram_total_mb(self) -> int:
         """Get total VRAM in MB"""
-        if not self.initialized:
-            return 0
-        try:
-            mem_info = self.pynvml.nvmlDeviceGetMemoryInfo(self.handle)
-            return int(mem_info.total / (1024 * 1024))
-        except Exception as e:
-            log.error(f"Failed to get total VRAM: {e}")
-            return 0
-    
+        return self.get_value("vram-total")
+
     def get_temperature(self) -> int:
         """Get current GPU temperature in Celsius"""
+        return self.get_value("temperature")
+
+    def get_power_watts(self) -> float:
+        """Get current board power draw in watts"""
+        return self.get_value("power")
+
+    def get_encoder_utilization(self) -> float:
+        """Get current video encoder usage percentage (0-100)"""
+        return self.get_value("encoder-usage")
+
+    def get_power_limit_watts(self) -> float:
+        """Get the enforced board power limit in watts"""
         if not self.initialized:
-            return 0
+            return 0.0
         try:
-            temp = self.pynvml.nvmlDeviceGetTemperature(self.handle, self.pynvml.NVML_TEMPERATURE_GPU)
-            return int(temp)
+            return self.pynvml.nvmlDeviceGetEnforcedPowerLimit(self.handle) / 1000
         except Exception as e:
-            log.error(f"Failed to get GPU temperature: {e}")
-            return 0
+            log.error(f"Failed to get power limit: {e}")
+            return 0.0
     
     def __del__(self):
         """Cleanup on destruction"""
@@ -101,12 +178,13 @@ class NVIDIAMonitor:
                 pass
 
 
-# Singleton instance
-_nvidia_monitor_instance = None
+# Singleton instance per GPU index
+_nvidia_monitor_instances: dict[int, NVIDIAMonitor] = {}
 
-def get_nvidia_monitor() -> NVIDIAMonitor:
-    """Get or create the singleton NVIDIA monitor instance"""
-    global _nvidia_monitor_instance
-    if _nvidia_monitor_instance is None:
-        _nvidia_monitor_instance = NVIDIAMonitor()
-    return _nvidia_monitor_instance
+def get_nvidia_monitor(index: int = 0) -> NVIDIAMonitor:
+    """Get or create the singleton NVIDIA monitor instance of a GPU"""
+    monitor = _nvidia_monitor_instances.get(index)
+    if monitor is None:
+        monitor = NVIDIAMonitor(index)
+        _nvidia_monitor_instances[index] = monitor
+    return monitor
@@ -0,0 +1,43 @@
+"""
+NVIDIA Touchscreen Timeline Action.
+Displays a wide multi-series timeline across the 800x100 Stream Deck+
+touchscreen strip.
+
+The strip is drawn in this process with the incremental ScrollingGraph at
+its native height: every tick the previous bitmap is scrolled and only the
+segment with the new samples is rasterized, so the cost follows the new
+data instead of the strip size. The whole time period is always shown; the
+step-aligned bitmap is scaled to the strip width unless the points divide
+it evenly. Periods longer than the strip is wide are downsampled
+incrementally as samples arrive.
+"""
+
+import numpy as np
+from PIL import Image
+
+from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIACustomGraph import NVIDIACustomGraph
+from plugins.com_streamcontroller_NVIDIAPlugin.Renderer import ScrollingGraph
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import GraphConfig
+
+# Stream Deck+ touchscreen size in pixels
+STRIP_WIDTH = 800
+STRIP_HEIGHT = 100
+
+
+class NVIDIATouchscreenGraph(NVIDIACustomGraph):
+    ACTION_NAME = "NVIDIA Touchscreen Timeline"
+    CONTROLS_KEY_IMAGE = True
+    RENDERS_IN_PROCESS = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.strip = ScrollingGraph(STRIP_WIDTH, STRIP_HEIGHT)
+        self.background = Image.new("RGBA", (STRIP_WIDTH, STRIP_HEIGHT), (0, 0, 0, 255))
+
+    def get_strip_windows(self, config: GraphConfig) -> list[np.ndarray]:
+        """The whole time period of every series, never padded beyond what was recorded"""
+        # At least two pixels per point (envelope buckets have two points)
+        return self.get_downsampled_windows(config, STRIP_WIDTH // 2)
+
+    def render_layers(self, config: GraphConfig) -> list[Image.Image]:
+        return [self.background, self.strip.render(config, self.get_strip_windows(config))]
@@ -4,25 +4,17 @@ Displays VRAM usage as a single-line graph with NVIDIA logo background.
 """
 
 from plugins.com_streamcontroller_NVIDIAPlugin.GraphBase import GraphBase
-from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
 
 
 class NVIDIAVRAMGraph(GraphBase):
     ACTION_NAME = "NVIDIA VRAM Usage Graph"
     CONTROLS_KEY_IMAGE = True
+    SERIES = ("vram-usage",)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.has_configuration = True
-        self.monitor = get_nvidia_monitor()
-        self.single_line_mode = True  # Only one line
 
     def on_ready(self):
-        self.show_graph()
+        self.show_graph(force=True)
 
-    def on_tick(self):
-        # Append new data point for VRAM usage only
-        self.percentages_1.append(self.monitor.get_vram_usage_percent())
-        
-        # Update the graph
-        self.show_graph()
@@ -0,0 +1,163 @@
+"""
+Lightweight per-stage timing for the graph pipeline.
+Stages are timed with the monotonic clock and aggregated into rolling
+histograms with fixed buckets, so recording is a bisect and two additions.
+Cheap enough to stay enabled in production.
+
+Stages:
+    sample     - NVML queries in NVIDIAMonitor
+    ipc        - queue round trip to the renderer, minus the time spent rendering
+    render     - drawing the graph layer in the renderer
+    encode     - PNG encode/decode of the matplotlib canvas
+    composite  - compositing the graph onto the logo background
+    set_media  - handing the finished image to StreamController
+"""
+
+import bisect
+import functools
+import threading
+import time
+
+from loguru import logger as log
+
+STAGES = ("sample", "ipc", "render", "encode", "composite", "set_media")
+
+# Histogram bucket upper bounds in milliseconds, the last bucket is unbounded
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Histograms cover between one and two of these windows (seconds)
+ROLLING_WINDOW = 60.0
+
+# Seconds between two log dumps when logging is enabled
+LOG_INTERVAL = 30.0
+
+
+class StageHistogram:
+    """Rolling histogram made of the current and the previous window"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rotated_at = time.monotonic()
+        self.current = self.new_window()
+        self.previous = self.new_window()
+
+    @staticmethod
+    def new_window() -> dict:
+        return {"buckets": [0] * (len(BUCKET_BOUNDS_MS) + 1), "total": 0.0, "max": 0.0}
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        bucket = bisect.bisect_left(BUCKET_BOUNDS_MS, ms)
+        now = time.monotonic()
+        with self.lock:
+            if now - self.rotated_at >= ROLLING_WINDOW:
+                self.previous = self.current
+                self.current = self.new_window()
+                self.rotated_at = now
+            window = self.current
+            window["buckets"][bucket] += 1
+            window["total"] += ms
+            if ms > window["max"]:
+                window["max"] = ms
+
+    def summary(self) -> dict:
+        """Count, mean, estimated p50/p99 (bucket upper bounds) and max, in ms"""
+        with self.lock:
+            buckets = [a + b for a, b in zip(self.current["buckets"], self.previous["buckets"])]
+            total = self.current["total"] + self.previous["total"]
+            maximum = max(self.current["max"], self.previous["max"])
+
+        count = sum(buckets)
+        if count == 0:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": count,
+            "mean_ms": total / count,
+            "p50_ms": self.percentile(buckets, count, 0.50, maximum),
+            "p99_ms": self.percentile(buckets, count, 0.99, maximum),
+            "max_ms": maximum,
+        }
+
+    @staticmethod
+    def percentile(buckets: list[int], count: int, fraction: float, maximum: float) -> float:
+        threshold = fraction * count
+        cumulative = 0
+        for bucket, bucket_count in enumerate(buckets):
+            cumulative += bucket_count
+            if cumulative >= threshold:
+                if bucket < len(BUCKET_BOUNDS_MS):
+                    return min(BUCKET_BOUNDS_MS[bucket], maximum)
+                return maximum
+        return maximum
+
+
+class PipelineStats:
+    def __init__(self):
+        self.histograms = {stage: StageHistogram() for stage in STAGES}
+        self.lock = threading.Lock()
+        self.log_enabled = False
+        self.next_log = 0.0
+
+    def record(self, stage: str, seconds: float):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, StageHistogram())
+        histogram.record(seconds)
+
+    def record_many(self, timings: list[tuple[str, float]]):
+        for stage, seconds in timings:
+            self.record(stage, seconds)
+
+    def snapshot(self) -> dict:
+        """Summary of every stage, see StageHistogram.summary"""
+        return {stage: histogram.summary() for stage, histogram in list(self.histograms.items())}
+
+    def format(self) -> str:
+        lines = ["Graph pipeline timings (ms):"]
+        for stage, summary in self.snapshot().items():
+            if summary["count"] == 0:
+                continue
+            lines.append(
+                f"  {stage:<10} n={summary['count']:<6} mean={summary['mean_ms']:.2f} "
+                f"p50<={summary['p50_ms']:.2f} p99<={summary['p99_ms']:.2f} max={summary['max_ms']:.2f}"
+            )
+        return "\n".join(lines)
+
+    def set_log_enabled(self, enabled: bool):
+        self.log_enabled = enabled
+        self.next_log = time.monotonic() + LOG_INTERVAL
+
+    def maybe_log(self):
+        """Dump the histograms to the log every LOG_INTERVAL while enabled"""
+        if not self.log_enabled:
+            return
+        now = time.monotonic()
+        if now >= self.next_log:
+            self.next_log = now + LOG_INTERVAL
+            log.info(self.format())
+
+
+def timed(stage: str):
+    """Decorator recording the duration of every call under the given stage"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                get_pipeline_stats().record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# Singleton instance
+_pipeline_stats_instance = None
+
+def get_pipeline_stats() -> PipelineStats:
+    """Get or create the singleton pipeline stats"""
+    global _pipeline_stats_instance
+    if _pipeline_stats_instance is None:
+        _pipeline_stats_instance = PipelineStats()
+    return _pipeline_stats_instance
@@ -0,0 +1,151 @@
+"""
+Immutable render configurations compiled once from action settings.
+Actions rebuild them only when a setting changes, so the per-tick path never
+parses settings, converts colors or looks up defaults.
+"""
+
+from dataclasses import dataclass
+
+from plugins.com_streamcontroller_NVIDIAPlugin.LabelFormat import LabelTemplate, get_label_template
+from plugins.com_streamcontroller_NVIDIAPlugin.MetricRegistry import METRICS, GRAPHABLE_METRICS
+
+# Metrics a graph series can show: label, unit and full-scale value.
+# A full scale of None is provided by the monitor (e.g. the board power limit).
+GRAPH_METRICS = {
+    metric: (METRICS[metric].label, METRICS[metric].unit, METRICS[metric].scale)
+    for metric in GRAPHABLE_METRICS
+}
+
+# Maximum number of series on one graph
+MAX_SERIES = 5
+
+# Graph settings defaults, colors per series index
+DEFAULT_LINE_COLORS = (
+    [0, 255, 0, 255],
+    [255, 165, 0, 255],
+    [0, 200, 255, 255],
+    [255, 64, 160, 255],
+    [255, 235, 59, 255],
+)
+DEFAULT_FILL_COLORS = (
+    [0, 255, 0, 100],
+    [255, 165, 0, 100],
+    [0, 200, 255, 100],
+    [255, 64, 160, 100],
+    [255, 235, 59, 100],
+)
+DEFAULT_LINE_WIDTH = 3
+DEFAULT_TIME_PERIOD = 15
+DEFAULT_DOWNSAMPLE_MODE = "envelope"
+DEFAULT_RENDER_BACKEND = "auto"
+
+# Tile styles of the multi-GPU grid, the first is the default
+GRID_STYLES = ("sparkline", "bar")
+
+# Metrics label settings defaults
+DEFAULT_LABEL_METRICS = ("none", "gpu-usage", "none")  # Top, center, bottom
+DEFAULT_FONT_SIZE = 16
+
+# Label positions, as used in the setting keys ("top-metric", "top-format", ...)
+LABEL_POSITIONS = ("top", "center", "bottom")
+
+
+def conv_color_to_plt(color: tuple[int, ...]) -> tuple[float, ...]:
+    """Convert RGB(A) 0-255 values to matplotlib 0-1 floats"""
+    return tuple(c / 255 for c in color)
+
+
+def normalize_color(color: list[int]) -> tuple[int, int, int, int]:
+    """RGB(A) list from the settings as an RGBA tuple"""
+    color = tuple(int(c) for c in color)
+    if len(color) == 3:
+        color += (255,)
+    return color
+
+
+@dataclass(frozen=True)
+class SeriesStyle:
+    metric: str  # Key of GRAPH_METRICS
+    unit: str
+    scale: float  # Value drawn at full height
+    line_rgba: tuple[int, int, int, int]  # 0-255, for PIL
+    fill_rgba: tuple[int, int, int, int]
+    line_color: tuple[float, ...]  # 0-1, for matplotlib
+    fill_color: tuple[float, ...]
+
+    @classmethod
+    def from_settings(cls, settings: dict, index: int, metric: str, scale: float) -> "SeriesStyle":
+        """Style of the series at index; colors keep the historic line1-color/fill1-color keys"""
+        line_rgba = normalize_color(settings.get(f"line{index + 1}-color", DEFAULT_LINE_COLORS[index]))
+        fill_rgba = normalize_color(settings.get(f"fill{index + 1}-color", DEFAULT_FILL_COLORS[index]))
+        return cls(
+            metric=metric,
+            unit=GRAPH_METRICS[metric][1],
+            scale=float(scale) or 1.0,
+            line_rgba=line_rgba,
+            fill_rgba=fill_rgba,
+            line_color=conv_color_to_plt(line_rgba),
+            fill_color=conv_color_to_plt(fill_rgba),
+        )
+
+
+@dataclass(frozen=True)
+class GraphConfig:
+    version: int  # Increases with every settings change of the action
+    series: tuple[SeriesStyle, ...]
+    line_width: int
+    time_period: int
+    dynamic_scaling: bool
+    scrolling_render: bool
+    stacked: bool  # Stack the series on top of each other instead of overlaying them
+    downsample_mode: str  # Reduction of windows wider than the key, see Downsample
+    render_backend: str  # Full redraw backend: "auto", "matplotlib" or "cairo"
+    grid_style: str  # Tile style of the multi-GPU grid, see GRID_STYLES
+
+    @classmethod
+    def from_settings(cls, settings: dict, version: int, metrics: list[str], scales: dict) -> "GraphConfig":
+        """
+        Compile the settings of a graph showing the given metrics.
+        scales maps each metric to its full-scale value.
+        """
+        series = tuple(
+            SeriesStyle.from_settings(settings, index, metric, scales[metric])
+            for index, metric in enumerate(metrics[:MAX_SERIES])
+        )
+        return cls(
+            version=version,
+            series=series,
+            line_width=settings.get("line-width", DEFAULT_LINE_WIDTH),
+            time_period=settings.get("time-period", DEFAULT_TIME_PERIOD),
+            dynamic_scaling=settings.get("dynamic-scaling", False),
+            scrolling_render=settings.get("scrolling-render", False),
+            stacked=settings.get("stacked", False),
+            downsample_mode=settings.get("downsample-mode", DEFAULT_DOWNSAMPLE_MODE),
+            render_backend=settings.get("render-backend", DEFAULT_RENDER_BACKEND),
+            grid_style=settings.get("grid-style", GRID_STYLES[0]),
+        )
+
+
+@dataclass(frozen=True)
+class LabelConfig:
+    metrics: tuple[str, str, str]  # Top, center, bottom
+    templates: tuple[LabelTemplate, LabelTemplate, LabelTemplate]  # Custom format or the metric's
+    snapshot_metrics: frozenset  # Every metric the templates read
+    font_size: int
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "LabelConfig":
+        metrics = tuple(
+            settings.get(f"{position}-metric", default)
+            for position, default in zip(LABEL_POSITIONS, DEFAULT_LABEL_METRICS)
+        )
+        templates = tuple(
+            get_label_template(metric, settings.get(f"{position}-format", ""))
+            for position, metric in zip(LABEL_POSITIONS, metrics)
+        )
+        return cls(
+            metrics=metrics,
+            templates=templates,
+            snapshot_metrics=frozenset().union(*(template.metrics for template in templates)),
+            font_size=settings.get("font-size", DEFAULT_FONT_SIZE),
+        )
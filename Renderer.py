@@ -0,0 +1,448 @@
+"""
+Graph renderer, run in the renderer processes started by the FrameScheduler.
+
+Depends only on NumPy, Pillow, matplotlib (and pycairo when installed), not
+on GTK or StreamController. Together with FrameScheduler keeping the app's
+__main__ out of the child (start_renderer_process), a renderer process
+starts without importing the UI stack; benchmarks/bench_render.py checks
+this. The incremental ScrollingGraph is also used in the plugin process by
+actions that draw their frames themselves.
+"""
+
+import io
+import math
+import time
+from multiprocessing import Queue
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from PIL import Image, ImageDraw
+try:
+    import cairo
+except ImportError:
+    cairo = None  # Only the matplotlib backend is available
+
+from plugins.com_streamcontroller_NVIDIAPlugin.BackgroundCache import get_background
+from plugins.com_streamcontroller_NVIDIAPlugin.Downsample import Downsampler, get_bucket_size
+from plugins.com_streamcontroller_NVIDIAPlugin.RingBuffer import RingBuffer
+from plugins.com_streamcontroller_NVIDIAPlugin.RendererProtocol import unpack_frames
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import GraphConfig
+
+# Maximum number of data points to retain (one hour of samples)
+MAX_DATA_POINTS = 3600
+
+# Rendered graph size in pixels (square) and the DPI used to get there
+GRAPH_SIZE = 600
+GRAPH_DPI = 100
+
+# Opacity of the NVIDIA logo watermark behind the graph
+GRAPH_LOGO_OPACITY = 0.35
+
+# Backends for full redraws; "auto" uses the fastest one, measured once by the
+# FrameScheduler before the first full redraw
+RENDER_BACKENDS = ("auto", "matplotlib", "cairo")
+
+# Frames rendered per backend for the "auto" measurement
+BACKEND_TRIALS = 3
+
+# Newest points of a window that may still change in place (the bucket being
+# filled when downsampling), the scrolling renderer always redraws them
+TAIL_POINTS = 2
+
+
+class RenderSession:
+    """Renderer-side state of one graph action: its config and a mirror of its history"""
+
+    def __init__(self, config: GraphConfig, plugin_dir: str, history: list[bytes]):
+        self.config = config
+        self.plugin_dir = plugin_dir
+        self.series = []
+        for data in history:
+            buffer = RingBuffer(MAX_DATA_POINTS)
+            buffer.extend(np.frombuffer(data, dtype=np.float32))
+            self.series.append(buffer)
+
+        # Periods wider than the key are downsampled as samples arrive
+        self.downsampler = None
+        if get_bucket_size(config.time_period) > 1:
+            self.downsampler = Downsampler(config.downsample_mode, len(self.series), config.time_period)
+            self.downsampler.extend([buffer.window(len(buffer)) for buffer in self.series])
+
+        self.scrolling_graph = ScrollingGraph()  # Keeps its bitmap between frames
+
+    def append(self, samples: list[np.ndarray]):
+        for buffer, values in zip(self.series, samples):
+            buffer.extend(values)
+        if self.downsampler is not None:
+            self.downsampler.extend(samples)
+
+    def get_windows(self) -> list[np.ndarray]:
+        if self.downsampler is not None:
+            return self.downsampler.window()
+        return [buffer.window(self.config.time_period) for buffer in self.series]
+
+
+def compute_bands(config: GraphConfig, windows: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Lower and upper edge of every series, shape (series, samples), in units
+    of each series' full scale, plus the top of the Y axis. Overlaid series
+    start at 0; stacked series start on top of the previous one.
+    """
+    scales = np.array([style.scale for style in config.series], dtype=np.float32)
+    values = np.clip(np.vstack(windows), 0, None) / scales[:, None]
+    if config.stacked:
+        uppers = np.cumsum(values, axis=0)
+        lowers = uppers - values
+    else:
+        uppers = values
+        lowers = np.zeros_like(values)
+
+    if config.dynamic_scaling:
+        y_top = float(uppers.max()) or 1.0
+    else:
+        y_top = float(len(windows)) if config.stacked else 1.0
+    return lowers, uppers, y_top
+
+
+def run_renderer(task_queue: Queue, result_queue: Queue):
+    """Entry point of a renderer process, see FrameScheduler.RendererProcess"""
+    GraphCreator(task_queue, result_queue).run()
+
+
+def measure_fastest_backend() -> str:
+    """Render a sample frame with every available backend and return the fastest"""
+    if cairo is None:
+        return "matplotlib"
+    creator = GraphCreator(task_queue=None, result_queue=None)
+    config = GraphConfig.from_settings({}, 0, ["gpu-usage", "vram-usage"], {"gpu-usage": 100, "vram-usage": 100})
+    x = np.arange(60, dtype=np.float32)
+    windows = [50 + 40 * np.sin(x / 7), 60 + 10 * np.cos(x / 5)]
+    timings = {}
+    for backend, render in (("matplotlib", creator.render_full), ("cairo", creator.render_cairo)):
+        start = time.perf_counter()
+        for _ in range(BACKEND_TRIALS):
+            render(config, windows)
+        timings[backend] = time.perf_counter() - start
+    return min(timings, key=timings.get)
+
+
+class GraphCreator:
+    """Renders the frames of the graph sessions pinned to one renderer process"""
+
+    def __init__(self, task_queue: Queue, result_queue: Queue):
+        self.task_queue = task_queue
+        self.result_queue = result_queue
+        self.sessions: dict[int, RenderSession] = {}
+        self.stage_timings: list[tuple[str, float]] = []  # Sent back with the next result
+
+    def run(self):
+        while True:
+            command, payload = self.task_queue.get()
+            if command == "stop":
+                break
+            if command == "close":
+                # Action was removed, forget its session
+                self.sessions.pop(payload, None)
+                continue
+
+            # One batch of frames per message, one result message per batch
+            configures, records, sent_at = payload
+            batch_start = time.monotonic()
+            frames = self.render_batch(configures, records)
+            timings, self.stage_timings = self.stage_timings, []
+            self.result_queue.put(("frames", frames, timings, sent_at, time.monotonic() - batch_start))
+
+    def record_stage(self, stage: str, start: float):
+        self.stage_timings.append((stage, time.perf_counter() - start))
+
+    def render_batch(self, configures: list, records: bytes) -> list[tuple]:
+        """Apply session configures, then render one frame per record"""
+        for session_id, config, plugin_dir, history in configures:
+            self.sessions[session_id] = RenderSession(config, plugin_dir, history)
+
+        frames = []
+        for session_id, version, samples in unpack_frames(records):
+            session = self.sessions.get(session_id)
+            if session is None or session.config.version != version:
+                # Out of sync, the action will reconfigure the session
+                frames.append((session_id, None))
+                continue
+            session.append(samples)
+            try:
+                image = self.generate_graph(session.config, session.get_windows(), session.plugin_dir,
+                                            session.scrolling_graph)
+            except Exception:
+                # Return None on error so the action can send its next frame
+                image = None
+            frames.append((session_id, image))
+        return frames
+
+    def generate_graph(self, config: GraphConfig, windows: list[np.ndarray], plugin_dir: str = "",
+                       scrolling_graph: "ScrollingGraph" = None):
+        """Generate a graph of all series with the NVIDIA logo background"""
+        if config.scrolling_render:
+            if scrolling_graph is None:
+                scrolling_graph = ScrollingGraph()
+            start = time.perf_counter()
+            graph_img = scrolling_graph.render(config, windows)
+            self.record_stage("render", start)
+        elif self.get_backend(config) == "cairo":
+            graph_img = self.render_cairo(config, windows)
+        else:
+            # Records its own render and encode stages
+            graph_img = self.render_full(config, windows)
+
+        start = time.perf_counter()
+        graph_img = self.add_logo(graph_img, plugin_dir)
+        self.record_stage("composite", start)
+        return graph_img
+
+    def get_backend(self, config: GraphConfig) -> str:
+        """Full redraw backend of a config, falling back to matplotlib without pycairo"""
+        backend = config.render_backend
+        if backend == "auto":
+            # Resolved by the FrameScheduler; only configs from elsewhere get here
+            backend = "matplotlib"
+        if backend == "cairo" and cairo is None:
+            backend = "matplotlib"
+        return backend
+
+    def render_cairo(self, config: GraphConfig, windows: list[np.ndarray]) -> Image:
+        """
+        Redraw every point of the graph with Cairo into an ARGB32 surface,
+        same layout as render_full. The surface bytes go to PIL directly
+        instead of through PNG.
+        """
+        start = time.perf_counter()
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, GRAPH_SIZE, GRAPH_SIZE)
+        length = len(windows[0]) if windows else 0
+        if length:
+            lowers, uppers, y_top = compute_bands(config, windows)
+            xs = (np.arange(length) * (GRAPH_SIZE / max(length - 1, 1))).tolist()
+            to_y = lambda edge: (GRAPH_SIZE - np.clip(edge, 0, y_top) / y_top * GRAPH_SIZE).tolist()
+
+            context = cairo.Context(surface)
+            context.set_antialias(cairo.ANTIALIAS_GOOD)
+            context.set_line_join(cairo.LINE_JOIN_ROUND)
+            # Matplotlib line widths are in points
+            context.set_line_width(config.line_width * GRAPH_DPI / 72)
+
+            # All fills first, then all lines on top
+            upper_ys = [to_y(upper) for upper in uppers]
+            for style, upper_y, lower in zip(config.series, upper_ys, lowers):
+                lower_y = to_y(lower)
+                context.move_to(xs[0], upper_y[0])
+                for x, y in zip(xs, upper_y):
+                    context.line_to(x, y)
+                for x, y in zip(reversed(xs), reversed(lower_y)):
+                    context.line_to(x, y)
+                context.close_path()
+                context.set_source_rgba(*style.fill_color)
+                context.fill()
+            for style, upper_y in zip(config.series, upper_ys):
+                context.move_to(xs[0], upper_y[0])
+                for x, y in zip(xs, upper_y):
+                    context.line_to(x, y)
+                context.set_source_rgba(*style.line_color)
+                context.stroke()
+        surface.flush()
+        self.record_stage("render", start)
+
+        start = time.perf_counter()
+        # Cairo stores premultiplied native-endian ARGB, which is BGRa on little endian
+        graph_img = Image.frombuffer(
+            "RGBA", (GRAPH_SIZE, GRAPH_SIZE), bytes(surface.get_data()), "raw", "BGRa", surface.get_stride(), 1
+        )
+        self.record_stage("encode", start)
+        return graph_img
+
+    def render_full(self, config: GraphConfig, windows: list[np.ndarray]) -> Image:
+        """
+        Redraw every point of the graph with matplotlib.
+        All fills go into one PolyCollection and all lines into one
+        LineCollection, built with NumPy, so extra series only add rasterization.
+        """
+        start = time.perf_counter()
+
+        # Create a new figure with a transparent background. Figure is used
+        # without pyplot, which would keep track of it and pick a GUI backend
+        fig = Figure(figsize=(GRAPH_SIZE / GRAPH_DPI, GRAPH_SIZE / GRAPH_DPI), dpi=GRAPH_DPI)
+        fig.patch.set_alpha(0)
+        fig.patch.set_facecolor('none')
+
+        # Set the FigureCanvas to the backend
+        canvas = FigureCanvas(fig)
+
+        # Plot the data with a transparent background
+        ax = fig.add_axes([0., 0., 1., 1.])
+        ax.set_axis_off()
+        ax.patch.set_alpha(0)  # Make axes background transparent
+        ax.patch.set_facecolor('none')
+
+        length = len(windows[0]) if windows else 0
+        if length:
+            lowers, uppers, y_top = compute_bands(config, windows)
+            x = np.arange(length, dtype=np.float32)
+
+            # Fill polygons: along the upper edge, back along the lower edge
+            polygons = np.empty((len(windows), 2 * length, 2), dtype=np.float32)
+            polygons[:, :length, 0] = x
+            polygons[:, :length, 1] = uppers
+            polygons[:, length:, 0] = x[::-1]
+            polygons[:, length:, 1] = lowers[:, ::-1]
+            lines = np.stack([np.broadcast_to(x, uppers.shape), uppers], axis=-1)
+
+            # Colors were converted when the config was compiled
+            ax.add_collection(PolyCollection(
+                polygons, facecolors=[style.fill_color for style in config.series], edgecolors="none"
+            ))
+            ax.add_collection(LineCollection(
+                lines, colors=[style.line_color for style in config.series], linewidths=config.line_width
+            ))
+            ax.set_xlim(0, max(length - 1, 1))
+            ax.set_ylim(0, y_top)
+
+        # Hide the spines
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+
+        # Turn off the axis
+        ax.axis('off')
+
+        # Draw the canvas and retrieve the buffer
+        canvas.draw()
+        self.record_stage("render", start)
+
+        start = time.perf_counter()
+        buf = io.BytesIO()
+        canvas.print_png(buf)
+
+        # Convert buffer to a Pillow Image
+        buf.seek(0)
+        graph_img = Image.open(buf).copy()
+        buf.close()
+
+        # Ensure graph is in RGBA mode for compositing
+        if graph_img.mode != "RGBA":
+            graph_img = graph_img.convert("RGBA")
+        self.record_stage("encode", start)
+        return graph_img
+
+    def add_logo(self, graph_img: Image, plugin_dir: str) -> Image:
+        """Composite the graph onto the cached black + NVIDIA logo background"""
+        try:
+            background = get_background(plugin_dir, graph_img.size, GRAPH_LOGO_OPACITY)
+            if background is not None:
+                # Graph's opaque areas cover the logo
+                graph_img = Image.alpha_composite(background, graph_img)
+        except Exception:
+            # If logo fails, continue without it
+            pass
+
+        return graph_img
+
+
+class ScrollingGraph:
+    """
+    Incremental renderer for rolling graphs.
+    Keeps the previous graph bitmap, shifts it left by the number of new
+    samples and only rasterizes the newest segments. A full redraw happens
+    when the settings, the window length or the Y-axis maximum change.
+
+    The frame is the canvas scaled to width x height.
+    """
+
+    def __init__(self, width: int = GRAPH_SIZE, height: int = GRAPH_SIZE):
+        self.width = width
+        self.height = height
+        self.canvas = None  # Step-aligned graph bitmap, RGBA
+        self.image = None  # Last frame at width x height
+        self.series = None  # Data currently drawn on the canvas
+        self.layout = None  # Everything besides the data the canvas depends on
+
+    def render(self, config: GraphConfig, windows: list[np.ndarray]) -> Image:
+        series = [np.array(values, dtype=np.float32) for values in windows]
+
+        length = len(series[0]) if series else 0
+        if length < 2:
+            self.canvas = self.image = self.series = self.layout = None
+            return Image.new("RGBA", (self.width, self.height), (0, 0, 0, 0))
+
+        lowers, uppers, y_top = compute_bands(config, series)
+
+        # Matplotlib line widths are in points at GRAPH_SIZE
+        line_px = max(1, round(config.line_width * GRAPH_DPI / 72 * self.height / GRAPH_SIZE))
+        step = math.ceil(self.width / (length - 1))
+        layout = (config.series, config.stacked, line_px, length, y_top, step)
+
+        if layout == self.layout and all(np.array_equal(old, new) for old, new in zip(self.series, series)):
+            return self.image
+        shift = self.find_shift(series) if layout == self.layout else None
+
+        if shift is None:
+            # Full redraw
+            self.canvas = Image.new("RGBA", (step * (length - 1), self.height), (0, 0, 0, 0))
+            start_x = 0
+        else:
+            # Scroll the old bitmap and redraw only the strip right of the
+            # last stable sample that was already on screen (plus the line overhang)
+            offset = shift * step
+            width = self.canvas.width
+            self.canvas.paste(self.canvas.crop((offset, 0, width, self.height)), (0, 0))
+            start_x = max(0, (length - 1 - TAIL_POINTS - shift) * step - line_px)
+
+        self.draw_strip(config, lowers, uppers, y_top, line_px, step, start_x)
+        self.series = series
+        self.layout = layout
+
+        if self.canvas.width == self.width:
+            self.image = self.canvas.copy()
+        else:
+            self.image = self.canvas.resize((self.width, self.height), Image.Resampling.BILINEAR)
+        return self.image
+
+    def find_shift(self, series: list[np.ndarray]):
+        """
+        Number of samples the data scrolled since the last frame, or None if
+        the new data is not a scrolled version of the old one. The last
+        TAIL_POINTS samples are ignored, they are redrawn anyway. Any
+        matching shift yields the exact same image.
+        """
+        if self.series is None or len(self.series) != len(series):
+            return None
+        stable = len(series[0]) - TAIL_POINTS
+        for shift in range(max(0, stable) // 2 + 1):
+            if all(np.array_equal(old[shift:stable], new[:stable - shift]) for old, new in zip(self.series, series)):
+                return shift
+        return None
+
+    def draw_strip(self, config: GraphConfig, lowers: np.ndarray, uppers: np.ndarray, y_top: float,
+                   line_px: int, step: int, start_x: int):
+        """Clear and redraw the canvas from start_x to its right edge"""
+        width = self.canvas.width - start_x
+        strip = Image.new("RGBA", (width, self.height), (0, 0, 0, 0))
+        first = max(0, start_x // step - 1)
+
+        # Pixel coordinates of the visible part, vectorized over all series
+        xs = np.arange(first, lowers.shape[1]) * step - start_x
+        to_y = lambda edge: self.height - np.clip(edge[:, first:], 0, y_top) / y_top * self.height
+        upper_ys, lower_ys = to_y(uppers), to_y(lowers)
+
+        # Same order as the full renderer: all fills, then all lines on top.
+        # Each fill is composited so overlapping fills blend like matplotlib.
+        lines = Image.new("RGBA", strip.size, (0, 0, 0, 0))
+        lines_draw = ImageDraw.Draw(lines)
+        for style, upper_y, lower_y in zip(config.series, upper_ys, lower_ys):
+            upper = list(zip(xs.tolist(), upper_y.tolist()))
+            lower = list(zip(xs[::-1].tolist(), lower_y[::-1].tolist()))
+
+            layer = Image.new("RGBA", strip.size, (0, 0, 0, 0))
+            ImageDraw.Draw(layer).polygon(upper + lower, fill=style.fill_rgba)
+            strip = Image.alpha_composite(strip, layer)
+
+            lines_draw.line(upper, fill=style.line_rgba, width=line_px, joint="curve")
+
+        strip = Image.alpha_composite(strip, lines)
+        self.canvas.paste(strip, (start_x, 0))
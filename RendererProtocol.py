@@ -0,0 +1,56 @@
+"""
+Messages between graph actions and the renderer processes.
+
+The renderer keeps one session per graph action with its own mirror of the
+action's history. A session is configured once, and again whenever its
+settings change; after that a frame only carries the samples appended
+since the previous frame, packed as a binary record.
+
+Task queue messages:
+    ("render", (configures, frames, sent_at))
+        configures: list of (session_id, GraphConfig, plugin_dir, history)
+                    where history holds the full float32 history bytes of each series
+        frames: concatenated frame records, one per session to render
+        sent_at: time.monotonic() when the batch was queued
+    ("close", session_id)
+    ("stop", None)
+
+Frame record: FRAME_HEADER (session id, config version, new sample count,
+series count) followed by `count` little-endian float32 samples for each
+series. The renderer refuses records whose config version does not match
+the one its session was configured with.
+
+Result queue messages:
+    ("frames", [(session_id, image or None), ...], timings, sent_at, batch_seconds)
+        timings: [(stage, seconds), ...] measured in the renderer, see PipelineStats
+        sent_at: echoed from the render message
+        batch_seconds: time the renderer spent on the batch
+"""
+
+import struct
+
+import numpy as np
+
+FRAME_HEADER = struct.Struct("<IIHB")
+SAMPLE_DTYPE = np.dtype("<f4")
+
+
+def pack_frame(session_id: int, config_version: int, series: list[np.ndarray]) -> bytes:
+    """Pack the newest samples of every series (all the same length) into one record"""
+    count = len(series[0]) if series else 0
+    return FRAME_HEADER.pack(session_id, config_version, count, len(series)) + b"".join(
+        np.asarray(values, dtype=SAMPLE_DTYPE).tobytes() for values in series
+    )
+
+
+def unpack_frames(data: bytes):
+    """Yield (session_id, config_version, [samples per series]) for every record in data"""
+    offset = 0
+    while offset < len(data):
+        session_id, config_version, count, series_count = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size
+        series = []
+        for _ in range(series_count):
+            series.append(np.frombuffer(data, dtype=SAMPLE_DTYPE, count=count, offset=offset))
+            offset += count * SAMPLE_DTYPE.itemsize
+        yield session_id, config_version, series
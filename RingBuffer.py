@@ -0,0 +1,68 @@
+"""
+Fixed-capacity float32 ring buffer for graph history.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    History of the newest `capacity` samples with O(1) append.
+    Every sample is stored twice, at its slot and at slot + capacity, so any
+    window of up to `capacity` samples is a contiguous view of the storage:
+    reading or resizing the window never allocates or copies.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=np.float32)
+        self.head = 0  # Slot the next sample is written to
+        self.count = 0  # Number of samples appended so far, capped at capacity
+        self.total = 0  # Number of samples ever appended, for delta tracking
+
+    def append(self, value: float):
+        self.data[self.head] = value
+        self.data[self.head + self.capacity] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total += 1
+
+    def extend(self, values):
+        """Append many samples at once using slice copies"""
+        values = np.asarray(values, dtype=np.float32)
+        appended = len(values)
+        values = values[-self.capacity:]
+        length = len(values)
+        self.total += appended
+        if length == 0:
+            return
+
+        # Samples older than the capacity would be overwritten anyway
+        start = (self.head + appended - length) % self.capacity
+        first = min(length, self.capacity - start)
+        for offset in (0, self.capacity):
+            self.data[start + offset:start + offset + first] = values[:first]
+            self.data[offset:offset + length - first] = values[first:]
+        self.head = (start + length) % self.capacity
+        self.count = min(self.count + appended, self.capacity)
+
+    def window(self, length: int) -> np.ndarray:
+        """
+        The newest `length` samples, oldest first, as a contiguous float32 view.
+        Samples that were never recorded read as 0.
+        """
+        length = max(0, min(length, self.capacity))
+        end = self.head + self.capacity
+        return self.data[end - length:end]
+
+    def latest(self) -> float:
+        return float(self.data[self.head + self.capacity - 1])
+
+    def clear(self):
+        self.data.fill(0)
+        self.head = 0
+        self.count = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        return self.count
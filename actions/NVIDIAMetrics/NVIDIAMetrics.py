@@ -12,6 +12,12 @@ gi.require_version("Adw", "1")
 from gi.repository import Gtk, Adw
 
 from plugins.com_streamcontroller_NVIDIAPlugin.NVIDIAMonitor import get_nvidia_monitor
+from plugins.com_streamcontroller_NVIDIAPlugin.LabelFormat import TEMPLATE_FIELDS
+from plugins.com_streamcontroller_NVIDIAPlugin.MetricRegistry import METRICS
+from plugins.com_streamcontroller_NVIDIAPlugin.RenderConfig import LabelConfig, LABEL_POSITIONS
+
+# Dropdown entries: "none" first, then every metric
+METRIC_OPTIONS = ["none"] + list(METRICS)
 
 
 class NVIDIAMetrics(ActionBase):
@@ -19,135 +25,95 @@ class NVIDIAMetrics(ActionBase):
         super().__init__(*args, **kwargs)
         self.has_configuration = True
         self.monitor = get_nvidia_monitor()
+        self.label_config: LabelConfig = None  # Compiled settings, rebuilt only on settings changes
+        self.shown_labels = [None, None, None]  # (text, font size) last set per position
 
     def on_ready(self):
+        # The deck may have been redrawn without our labels
+        self.shown_labels = [None, None, None]
         self.update()
 
     def on_tick(self):
         self.update()
 
+    def get_label_config(self) -> LabelConfig:
+        config = self.label_config
+        if config is None:
+            config = LabelConfig.from_settings(self.get_settings())
+            self.label_config = config
+        return config
+
+    def save_settings(self, settings: dict):
+        """Store changed settings, recompile the label config and redraw"""
+        self.set_settings(settings)
+        self.label_config = None
+        self.update()
+
     def update(self):
-        settings = self.get_settings()
-        
-        # Get metric choices for each label position
-        top_metric = settings.get("top-metric", "none")
-        center_metric = settings.get("center-metric", "gpu-usage")
-        bottom_metric = settings.get("bottom-metric", "none")
-        
-        font_size = settings.get("font-size", 16)
-        
-        # Update each label position
-        self.set_top_label(text=self.get_metric_text(top_metric), font_size=font_size)
-        self.set_center_label(text=self.get_metric_text(center_metric), font_size=font_size)
-        self.set_bottom_label(text=self.get_metric_text(bottom_metric), font_size=font_size)
-
-    def get_metric_text(self, metric: str) -> str:
-        """Get formatted text for the specified metric"""
-        if metric == "none":
-            return ""
-        elif metric == "gpu-usage":
-            return f"{round(self.monitor.get_gpu_utilization())}%"
-        elif metric == "vram-usage":
-            return f"{round(self.monitor.get_vram_usage_percent())}%"
-        elif metric == "vram-total":
-            return f"{self.monitor.get_vram_total_mb()} MB"
-        elif metric == "temperature":
-            return f"{self.monitor.get_temperature()}°C"
-        elif metric == "vram-used":
-            return f"{self.monitor.get_vram_used_mb()} MB"
-        else:
-            return ""
+        config = self.get_label_config()
+
+        # One read of every metric shown, whatever label shows it
+        snapshot = self.monitor.get_snapshot(config.snapshot_metrics)
+
+        setters = (self.set_top_label, self.set_center_label, self.set_bottom_label)
+        for position, (setter, template) in enumerate(zip(setters, config.templates)):
+            label = (template.format(snapshot), config.font_size)
+            if label == self.shown_labels[position]:
+                # Unchanged, don't make the deck redraw the key
+                continue
+            self.shown_labels[position] = label
+            setter(text=label[0], font_size=label[1])
 
     def get_config_rows(self) -> list:
         # Create metric dropdown options
         metric_options = Gtk.StringList()
-        metric_options.append("None")
-        metric_options.append("GPU Usage %")
-        metric_options.append("VRAM Usage %")
-        metric_options.append("VRAM Used (MB)")
-        metric_options.append("Total VRAM (MB)")
-        metric_options.append("Temperature (°C)")
-
-        # Top label metric selector
-        self.top_metric_row = Adw.ComboRow(
-            model=metric_options,
-            title="Top Label Metric"
-        )
-
-        # Center label metric selector
-        self.center_metric_row = Adw.ComboRow(
-            model=metric_options,
-            title="Center Label Metric"
-        )
-
-        # Bottom label metric selector
-        self.bottom_metric_row = Adw.ComboRow(
-            model=metric_options,
-            title="Bottom Label Metric"
-        )
+        for metric in METRIC_OPTIONS:
+            metric_options.append("None" if metric == "none" else METRICS[metric].get_option_label())
+
+        # Load saved settings
+        config = self.get_label_config()
+        settings = self.get_settings()
+
+        # Metric selector per label position
+        self.metric_rows = []
+        for position, metric in zip(LABEL_POSITIONS, config.metrics):
+            row = Adw.ComboRow(model=metric_options, title=f"{position.title()} Label Metric")
+            row.set_selected(METRIC_OPTIONS.index(metric) if metric in METRIC_OPTIONS else 0)
+            row.connect("notify::selected", self.on_metric_change)
+            self.metric_rows.append(row)
+
+        # Format templates, shown instead of the label's metric when set
+        fields = ", ".join("{" + field + "}" for field in TEMPLATE_FIELDS)
+        self.format_rows = []
+        for position in LABEL_POSITIONS:
+            row = Adw.EntryRow(title=f"{position.title()} Label Format")
+            row.set_show_apply_button(True)
+            row.set_text(settings.get(f"{position}-format", ""))
+            row.set_tooltip_text(f"e.g. {{gpu:.0f}}% {{temp}}°C\nFields: {fields}")
+            row.connect("apply", self.on_format_change)
+            self.format_rows.append(row)
 
         # Font size selector
         self.font_size_row = Adw.SpinRow.new_with_range(8, 48, 1)
         self.font_size_row.set_title("Font Size")
-
-        # Load saved settings
-        settings = self.get_settings()
-        
-        # Map metric names to indices
-        metric_map = {
-            "none": 0,
-            "gpu-usage": 1,
-            "vram-usage": 2,
-            "vram-used": 3,
-            "vram-total": 4,
-            "temperature": 5
-        }
-        
-        top_metric = settings.get("top-metric", "none")
-        center_metric = settings.get("center-metric", "gpu-usage")
-        bottom_metric = settings.get("bottom-metric", "none")
-        
-        self.top_metric_row.set_selected(metric_map.get(top_metric, 0))
-        self.center_metric_row.set_selected(metric_map.get(center_metric, 1))
-        self.bottom_metric_row.set_selected(metric_map.get(bottom_metric, 0))
-        
-        self.font_size_row.set_value(settings.get("font-size", 16))
-
-        # Connect signals
-        self.top_metric_row.connect("notify::selected", self.on_metric_change)
-        self.center_metric_row.connect("notify::selected", self.on_metric_change)
-        self.bottom_metric_row.connect("notify::selected", self.on_metric_change)
+        self.font_size_row.set_value(config.font_size)
         self.font_size_row.connect("changed", self.on_font_size_change)
 
-        return [
-            self.top_metric_row,
-            self.center_metric_row,
-            self.bottom_metric_row,
-            self.font_size_row
-        ]
+        return self.metric_rows + self.format_rows + [self.font_size_row]
 
     def on_metric_change(self, *args):
         settings = self.get_settings()
-        
-        # Map indices back to metric names
-        index_to_metric = {
-            0: "none",
-            1: "gpu-usage",
-            2: "vram-usage",
-            3: "vram-used",
-            4: "vram-total",
-            5: "temperature"
-        }
-        
-        settings["top-metric"] = index_to_metric.get(self.top_metric_row.get_selected(), "none")
-        settings["center-metric"] = index_to_metric.get(self.center_metric_row.get_selected(), "gpu-usage")
-        settings["bottom-metric"] = index_to_metric.get(self.bottom_metric_row.get_selected(), "none")
-        
-        self.set_settings(settings)
-        self.update()
+        for position, row in zip(LABEL_POSITIONS, self.metric_rows):
+            settings[f"{position}-metric"] = METRIC_OPTIONS[row.get_selected()]
+        self.save_settings(settings)
+
+    def on_format_change(self, *args):
+        settings = self.get_settings()
+        for position, row in zip(LABEL_POSITIONS, self.format_rows):
+            settings[f"{position}-format"] = row.get_text()
+        self.save_settings(settings)
 
     def on_font_size_change(self, spin):
         settings = self.get_settings()
         settings["font-size"] = int(spin.get_value())
-        self.set_settings(settings)
-        self.update()
+        self.save_settings(settings)
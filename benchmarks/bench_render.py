@@ -0,0 +1,283 @@
+"""
+Headless benchmark of the plugin's per-tick render paths.
+
+Runs each path for a number of simulated keys with StreamController stubbed
+out and a synthetic metrics source, then reports frames/s, p50/p99 tick
+latency, traced allocations and RSS. It also checks that a renderer
+process starts without the UI stack. Results are compared against stored
+baselines and the run fails when a path regresses past the tolerance.
+Baselines are machine specific and not shipped: store them once on the
+machine that runs the checks (--update-baselines), and pass
+--require-baselines in CI so a run without them fails instead of passing
+unchecked.
+
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --paths full scrolling --keys 1 8
+    python benchmarks/bench_render.py --update-baselines
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stubs
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+PATHS = ("full", "cairo", "scrolling", "logo", "metrics")
+DEFAULT_KEYS = (1, 4, 16)
+
+# Ticks traced with tracemalloc, kept short because tracing is slow
+ALLOC_TICKS = 10
+
+
+def plugin_module(name: str):
+    return importlib.import_module(f"{stubs.PLUGIN_PACKAGE}.{name}")
+
+
+def make_graph_tick(keys: int, scrolling: bool, backend: str = "matplotlib"):
+    """Sample, build and render one frame for every simulated graph key"""
+    graph_module = plugin_module("NVIDIACombinedGraph")
+    stats = plugin_module("PipelineStats").get_pipeline_stats()
+    creator = plugin_module("Renderer").GraphCreator(task_queue=None, result_queue=None)
+
+    actions = {}
+    for _ in range(keys):
+        action = graph_module.NVIDIACombinedGraph()
+        action.settings["scrolling-render"] = scrolling
+        action.settings["render-backend"] = backend
+        actions[action.session_id] = action
+
+    def tick() -> int:
+        configures, records = [], bytearray()
+        for action in actions.values():
+            action.sample()
+            message = action.build_frame()
+            if message is None:
+                continue
+            configure, record = message
+            if configure is not None:
+                configures.append(configure)
+            records += record
+
+        frames = creator.render_batch(configures, bytes(records))
+        stats.record_many(creator.stage_timings)
+        creator.stage_timings.clear()
+        for session_id, image in frames:
+            actions[session_id].on_frame_rendered(image)
+        return len(frames)
+
+    return tick
+
+
+def make_logo_tick(keys: int):
+    """Composite a transparent graph layer onto the cached background for every key"""
+    from PIL import Image
+
+    renderer = plugin_module("Renderer")
+    creator = renderer.GraphCreator(task_queue=None, result_queue=None)
+    layer = Image.new("RGBA", (renderer.GRAPH_SIZE, renderer.GRAPH_SIZE), (0, 0, 0, 0))
+
+    def tick() -> int:
+        for _ in range(keys):
+            creator.add_logo(layer, stubs.PLUGIN_ROOT)
+        return keys
+
+    return tick
+
+
+def make_metrics_tick(keys: int):
+    """Update the labels of every NVIDIAMetrics key"""
+    metrics_module = plugin_module("actions.NVIDIAMetrics.NVIDIAMetrics")
+    actions = []
+    for _ in range(keys):
+        action = metrics_module.NVIDIAMetrics()
+        action.settings.update({"top-metric": "temperature", "bottom-metric": "vram-used"})
+        actions.append(action)
+
+    def tick() -> int:
+        for action in actions:
+            action.update()
+        return keys
+
+    return tick
+
+
+def make_tick(path: str, keys: int):
+    if path == "full":
+        return make_graph_tick(keys, scrolling=False)
+    if path == "cairo":
+        return make_graph_tick(keys, scrolling=False, backend="cairo")
+    if path == "scrolling":
+        return make_graph_tick(keys, scrolling=True)
+    if path == "logo":
+        return make_logo_tick(keys)
+    return make_metrics_tick(keys)
+
+
+def check_renderer_imports() -> list[str]:
+    """UI modules loaded by a process started like a renderer, empty if none"""
+    scheduler = plugin_module("FrameScheduler")
+    context = scheduler.get_renderer_context()
+    queue = context.Queue()
+    process = context.Process(target=stubs.report_renderer_modules, args=(queue,), daemon=True)
+    scheduler.start_renderer_process(process)
+    try:
+        return queue.get(timeout=60)
+    finally:
+        process.join()
+
+
+def get_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(tick, ticks: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        tick()
+
+    latencies = []
+    frames = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick_start = time.perf_counter()
+        frames += tick()
+        latencies.append(time.perf_counter() - tick_start)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    traced_before, _ = tracemalloc.get_traced_memory()
+    for _ in range(ALLOC_TICKS):
+        tick()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "fps": frames / elapsed if elapsed else 0.0,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "alloc_kb": (traced_peak - traced_before) / 1024,
+        "rss_mb": get_rss_mb(),
+    }
+
+
+def load_baselines(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def find_regressions(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        if result["fps"] < baseline["fps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['fps']:.1f} frames/s, baseline {baseline['fps']:.1f}")
+        if result["p99_ms"] > baseline["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']:.2f} ms, baseline {baseline['p99_ms']:.2f}")
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    lines = [f"{'path/keys':<16}{'frames/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'alloc KiB':>11}{'RSS MiB':>10}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<16}{result['fps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['alloc_kb']:>11.1f}{result['rss_mb']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument("--keys", nargs="+", type=int, default=list(DEFAULT_KEYS),
+                        help="numbers of simulated keys")
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--pattern", choices=("busy", "idle"), default="busy",
+                        help="synthetic GPU load")
+    parser.add_argument("--baselines", default=BASELINES_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative regression before failing")
+    parser.add_argument("--update-baselines", action="store_true",
+                        help="store these results as the new baselines")
+    parser.add_argument("--require-baselines", action="store_true",
+                        help="fail when a result has no baseline to be checked against")
+    parser.add_argument("--stages", action="store_true",
+                        help="also report the per-stage pipeline timings")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--skip-import-check", action="store_true",
+                        help="do not check the imports of a renderer process")
+    args = parser.parse_args(argv)
+
+    stubs.install(args.pattern)
+
+    paths = list(args.paths)
+    if "cairo" in paths and plugin_module("Renderer").cairo is None:
+        print("pycairo is not installed, skipping the cairo path")
+        paths.remove("cairo")
+
+    results = {}
+    for path in paths:
+        for keys in args.keys:
+            results[f"{path}/{keys}"] = measure(make_tick(path, keys), args.ticks, args.warmup)
+
+    report = format_table(results)
+    if args.stages:
+        report += "\n\n" + plugin_module("PipelineStats").get_pipeline_stats().format()
+    status = 0
+    if not args.skip_import_check:
+        loaded = check_renderer_imports()
+        if loaded:
+            report += f"\n\nRenderer process imports UI modules: {', '.join(loaded)}"
+            status = 1
+        else:
+            report += "\n\nRenderer process imports: no UI modules"
+    if args.update_baselines:
+        baselines = load_baselines(args.baselines)
+        baselines.update(results)
+        with open(args.baselines, "w") as file:
+            json.dump(baselines, file, indent=4, sort_keys=True)
+        report += f"\n\nBaselines written to {args.baselines}"
+    else:
+        baselines = load_baselines(args.baselines)
+        missing = [name for name in results if name not in baselines]
+        if not baselines:
+            report += (f"\n\nNo baselines at {args.baselines}, nothing was checked for regressions "
+                       f"(store them with --update-baselines)")
+        elif missing:
+            report += f"\n\nNo baseline for: {', '.join(missing)} (run with --update-baselines)"
+        if missing and args.require_baselines:
+            status = 1
+        regressions = find_regressions(results, baselines, args.tolerance)
+        if regressions:
+            report += "\n\nRegressions:\n" + "\n".join(f"  {line}" for line in regressions)
+            status = 1
+
+    print(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Stand-ins for the StreamController and GTK modules the plugin imports, plus a
+synthetic metrics source, so render paths can run headless.
+Call install() before importing any plugin module.
+"""
+
+import math
+import os
+import random
+import sys
+import types
+
+PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN_PACKAGE = "plugins.com_streamcontroller_NVIDIAPlugin"
+
+
+class PluginBase:
+    PATH = PLUGIN_ROOT
+
+    def __init__(self):
+        self.settings = {}
+
+    def get_settings(self) -> dict:
+        return self.settings
+
+    def set_settings(self, settings: dict):
+        self.settings = settings
+
+
+class ActionBase:
+    """Records what an action would send to the deck instead of sending it"""
+
+    def __init__(self, *args, **kwargs):
+        self.plugin_base = kwargs.get("plugin_base") or PluginBase()
+        self.settings = {}
+        self.media_updates = 0
+        self.label_updates = 0
+        self.visible = True
+
+    def get_settings(self) -> dict:
+        return self.settings
+
+    def set_settings(self, settings: dict):
+        self.settings = settings
+
+    def set_media(self, image=None, *args, **kwargs):
+        self.media_updates += 1
+
+    def set_top_label(self, text=None, *args, **kwargs):
+        self.label_updates += 1
+
+    def set_center_label(self, text=None, *args, **kwargs):
+        self.label_updates += 1
+
+    def set_bottom_label(self, text=None, *args, **kwargs):
+        self.label_updates += 1
+
+    def get_is_present(self) -> bool:
+        return self.visible
+
+    def event_callback(self, event, data=None):
+        pass
+
+
+class StubScheduler:
+    """Hands out session ids; the benchmark drives frames itself"""
+
+    def __init__(self):
+        self.next_session_id = 0
+        self.history_store = None
+
+    def register(self, action) -> int:
+        self.next_session_id += 1
+        return self.next_session_id
+
+    def unregister(self, action):
+        pass
+
+    def set_idle_timeout(self, seconds: float):
+        pass
+
+    def set_history_store(self, store):
+        self.history_store = store
+
+    def request_frame(self, action, force: bool = False):
+        pass
+
+    def resolve_render_backend(self, config):
+        return config
+
+
+class SyntheticMonitor:
+    """
+    Deterministic replacement for NVIDIAMonitor.
+    "busy" produces a noisy sine wave, "idle" a flat 0% GPU.
+    """
+
+    def __init__(self, pattern: str = "busy", seed: int = 0):
+        self.pattern = pattern
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.initialized = True
+        self.index = 0
+
+    def next_value(self, base: float, amplitude: float) -> float:
+        if self.pattern == "idle":
+            return 0.0
+        self.calls += 1
+        value = base + amplitude * math.sin(self.calls / 7) + self.random.uniform(-5, 5)
+        return min(100.0, max(0.0, value))
+
+    def get_device_count(self) -> int:
+        return 1
+
+    def get_gpu_utilization(self) -> float:
+        return self.next_value(50, 40)
+
+    def get_vram_usage_percent(self) -> float:
+        return self.next_value(60, 10)
+
+    def get_vram_used_mb(self) -> int:
+        return int(self.get_vram_usage_percent() * 245.76)
+
+    def get_vram_total_mb(self) -> int:
+        return 24576
+
+    def get_temperature(self) -> int:
+        return int(self.next_value(60, 15))
+
+    def get_power_watts(self) -> float:
+        return self.next_value(50, 25) * 3.5
+
+    def get_power_limit_watts(self) -> float:
+        return 350.0
+
+    def get_encoder_utilization(self) -> float:
+        return self.next_value(20, 15)
+
+    def refresh(self, metrics):
+        pass
+
+    def get_snapshot(self, metrics) -> dict:
+        getters = {
+            "gpu-usage": self.get_gpu_utilization,
+            "vram-usage": self.get_vram_usage_percent,
+            "vram-used": self.get_vram_used_mb,
+            "vram-total": self.get_vram_total_mb,
+            "temperature": self.get_temperature,
+            "power": self.get_power_watts,
+            "encoder-usage": self.get_encoder_utilization,
+        }
+        return {metric: getters[metric]() for metric in metrics if metric in getters}
+
+
+# Modules a renderer process must not load: GTK and StreamController
+UI_MODULES = ("gi", "src", "globals")
+
+
+def report_renderer_modules(queue):
+    """
+    Target of the renderer import check: import the renderer module like a
+    renderer process does, then report which UI_MODULES the process has,
+    and the app's main module if multiprocessing re-imported it
+    """
+    _module("plugins", __path__=[])
+    _module(PLUGIN_PACKAGE, __path__=[PLUGIN_ROOT])
+    import importlib
+    importlib.import_module(f"{PLUGIN_PACKAGE}.Renderer")
+    loaded = [name for name in UI_MODULES if name in sys.modules]
+    # __mp_main__ is always there, but only a re-imported main has a file
+    main_path = getattr(sys.modules.get("__mp_main__"), "__file__", None)
+    if main_path is not None:
+        loaded.append(f"__mp_main__ ({main_path})")
+    queue.put(loaded)
+
+
+class _StubNamespace(types.ModuleType):
+    """Module whose unknown attributes are inert classes (for Gtk/Adw/Gdk)"""
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        cls = type(name, (), {"__init__": lambda self, *args, **kwargs: None})
+        setattr(self, name, cls)
+        return cls
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = sys.modules.get(name) or types.ModuleType(name)
+    for key, value in attributes.items():
+        setattr(module, key, value)
+    sys.modules[name] = module
+    return module
+
+
+def install(pattern: str = "busy") -> SyntheticMonitor:
+    """Register the stub modules and the synthetic monitor"""
+    # StreamController
+    _module("src")
+    _module("src.backend")
+    _module("src.backend.PluginManager")
+    _module("src.backend.PluginManager.ActionBase", ActionBase=ActionBase)
+    _module("src.backend.DeckManagement")
+    dial_events = types.SimpleNamespace(TURN_CW="turn-cw", TURN_CCW="turn-ccw", SHORT_UP="short-up")
+    _module("src.backend.DeckManagement.InputIdentifier",
+            Input=types.SimpleNamespace(Dial=types.SimpleNamespace(Events=dial_events)), InputEvent=str)
+    _module("src.Signals", Signals=types.SimpleNamespace(AppQuit="AppQuit"))
+    _module("globals", signal_manager=types.SimpleNamespace(connect_signal=lambda *args, **kwargs: None))
+
+    # GTK
+    repository = _module("gi.repository")
+    for name in ("Gtk", "Adw", "Gdk"):
+        namespace = _StubNamespace(f"gi.repository.{name}")
+        sys.modules[namespace.__name__] = namespace
+        setattr(repository, name, namespace)
+    _module("gi", require_version=lambda *args, **kwargs: None, repository=repository)
+
+    # The plugin itself, under the package name StreamController loads it as
+    _module("plugins", __path__=[])
+    _module(PLUGIN_PACKAGE, __path__=[PLUGIN_ROOT])
+    sys.path.append(PLUGIN_ROOT)
+
+    import importlib
+    monitor_module = importlib.import_module(f"{PLUGIN_PACKAGE}.NVIDIAMonitor")
+    monitor = SyntheticMonitor(pattern)
+    monitor_module._nvidia_monitor_instances[0] = monitor
+
+    graph_base = importlib.import_module(f"{PLUGIN_PACKAGE}.GraphBase")
+    scheduler = StubScheduler()
+    graph_base.get_frame_scheduler = lambda: scheduler
+    return monitor
@@ -10,6 +10,10 @@ import os
 sys.path.append(os.path.dirname(__file__))
 
 from .NVIDIACombinedGraph import NVIDIACombinedGraph
+from .NVIDIACustomGraph import NVIDIACustomGraph
+from .NVIDIATouchscreenGraph import NVIDIATouchscreenGraph
+from .NVIDIAGPUGrid import NVIDIAGPUGrid
+from .NVIDIAHybridGraph import NVIDIAHybridGraph
 from .NVIDIAGPUGraph import NVIDIAGPUGraph
 from .NVIDIAVRAMGraph import NVIDIAVRAMGraph
 from .NVIDIALogo import NVIDIALogo
@@ -76,6 +80,62 @@ class NVIDIAPlugin(PluginBase):
         )
         self.add_action_holder(self.nvidia_combined_graph_holder)
         
+        # Graph of up to five user-selected metrics
+        self.nvidia_custom_graph_holder = ActionHolder(
+            plugin_base=self,
+            action_base=NVIDIACustomGraph,
+            action_id_suffix="NVIDIACustomGraph",
+            action_name="NVIDIA Custom Graph",
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.nvidia_custom_graph_holder)
+        
+        # Wide timeline across the Stream Deck+ touchscreen
+        self.nvidia_touchscreen_graph_holder = ActionHolder(
+            plugin_base=self,
+            action_base=NVIDIATouchscreenGraph,
+            action_id_suffix="NVIDIATouchscreenGraph",
+            action_name="NVIDIA Touchscreen Timeline",
+            action_support={
+                Input.Key: ActionInputSupport.UNSUPPORTED,
+                Input.Dial: ActionInputSupport.UNSUPPORTED,
+                Input.Touchscreen: ActionInputSupport.SUPPORTED
+            }
+        )
+        self.add_action_holder(self.nvidia_touchscreen_graph_holder)
+        
+        # One key with a tile per GPU
+        self.nvidia_gpu_grid_holder = ActionHolder(
+            plugin_base=self,
+            action_base=NVIDIAGPUGrid,
+            action_id_suffix="NVIDIAGPUGrid",
+            action_name="NVIDIA Multi-GPU Grid",
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.nvidia_gpu_grid_holder)
+        
+        # Big current value over a faint sparkline
+        self.nvidia_hybrid_graph_holder = ActionHolder(
+            plugin_base=self,
+            action_base=NVIDIAHybridGraph,
+            action_id_suffix="NVIDIAHybridGraph",
+            action_name="NVIDIA Hybrid Graph",
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.nvidia_hybrid_graph_holder)
+        
         # Logo-only button (no graph, just NVIDIA branding)
         self.nvidia_logo_holder = ActionHolder(
             plugin_base=self,